@@ -0,0 +1,263 @@
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+import networkx as nx
+from pathlib import Path
+from datetime import datetime, timezone
+
+from graph6 import HEADER, iter_graph6_chunks
+from generators import resolve_backend
+from utils import gpn, gpn_batch, gpn_orbits
+
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+GE_DIR = DATA_DIR / "loaded" / "ge_files"
+GENERATED_DIR = DATA_DIR / "generated"
+DEFAULT_OUTPUT_DIR = DATA_DIR / "bench"
+
+# graphs per fixture timed with `utils.gpn`; gpn_batch always gets the whole file
+SAMPLE_SIZE = 2000
+DEFAULT_THRESHOLD = 0.10
+
+
+def _edge_based(num_nodes: int) -> list[bytes]:
+    with open(GE_DIR / f"edge-based-ge{num_nodes}c.g6", "rb") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _csv_column(name: str, column: str, **filters) -> list[bytes]:
+    frame = pd.read_csv(GENERATED_DIR / name)
+    for key, value in filters.items():
+        frame = frame[frame[key] == value]
+    return [
+        encoding.strip().removeprefix(HEADER.decode()).encode()
+        for encoding in frame[column].astype(str)
+    ]
+
+
+def _spread(encodings: list[bytes], size: int = SAMPLE_SIZE) -> list[bytes]:
+    """evenly spaced, deterministic sample"""
+
+    step = max(len(encodings) // size, 1)
+    return encodings[::step][:size]
+
+
+def _random_cubic(num_nodes: int, count: int = SAMPLE_SIZE) -> list[bytes]:
+    # the repo has no n=20 cubic table; seeded graphs stand in as a fixed fixture
+    return [
+        nx.to_graph6_bytes(nx.random_regular_graph(3, num_nodes, seed=seed), header=False).strip()
+        for seed in range(count)
+    ]
+
+
+def _symmetric_cubic() -> list[bytes]:
+    # prisms, Moebius ladders and generalized Petersen graphs on 40..62 nodes
+    graphs = [nx.circular_ladder_graph(k) for k in range(20, 32)]
+    graphs += [nx.LCF_graph(2 * k, [k], 2 * k) for k in range(20, 32)]
+    graphs += [nx.generalized_petersen_graph(k, j) for k in range(20, 32) for j in range(2, (k + 1) // 2)]
+    return [nx.to_graph6_bytes(graph, header=False).strip() for graph in graphs]
+
+
+def _complete_bipartite() -> list[bytes]:
+    return [
+        nx.to_graph6_bytes(nx.complete_bipartite_graph(a, n - a), header=False).strip()
+        for n in range(10, 61, 10) for a in range(1, n // 2 + 1)
+    ]
+
+
+# fixture name -> graph6 lines, all read from the repository (no network)
+FIXTURES = {
+    **{f"ge{n}c": (lambda n=n: _edge_based(n)) for n in range(9, 14)},
+    "cubic18": lambda: _spread(_csv_column("cubic_graphs_upto18.csv", "graph6_encoding", num_nodes=18)),
+    "cubic20": lambda: _random_cubic(20),
+    "bipartite11": lambda: _spread(_csv_column("bp_graph_data_n11.csv", "id")),
+    "bipartite12": lambda: _spread(_csv_column("bp_graph_data_n12.csv", "id")),
+    "sa25-30": lambda: [
+        encoding for encoding, n in zip(
+            _csv_column("sa_opt_larger_nodes.csv", "graph6_label"),
+            pd.read_csv(GENERATED_DIR / "sa_opt_larger_nodes.csv")["num_nodes"]
+        ) if 25 <= n <= 30
+    ],
+    # graphs with large automorphism groups, where gpn_orbits has something to skip
+    "symmetric-cubic": _symmetric_cubic,
+    "complete-bipartite": _complete_bipartite,
+}
+
+
+def bench_gpn(fixture: str) -> tuple[int, float, str]:
+    graphs = [nx.from_graph6_bytes(line) for line in _spread(FIXTURES[fixture]())]
+    start = time.perf_counter()
+    for graph in graphs:
+        gpn(graph)
+    return len(graphs), time.perf_counter() - start, "graphs/s"
+
+
+def bench_gpn_orbits(fixture: str) -> tuple[int, float, str]:
+    # same graphs as bench_gpn, so the two rates compare end to end
+    graphs = [nx.from_graph6_bytes(line) for line in _spread(FIXTURES[fixture]())]
+    start = time.perf_counter()
+    for graph in graphs:
+        gpn_orbits(graph)
+    return len(graphs), time.perf_counter() - start, "graphs/s"
+
+
+def bench_gpn_batch(fixture: str) -> tuple[int, float, str]:
+    lines = FIXTURES[fixture]()
+    start = time.perf_counter()
+    for chunk in iter_graph6_chunks(lines):
+        gpn_batch(chunk.bitsets)
+    return len(lines), time.perf_counter() - start, "graphs/s"
+
+
+def bench_generator(family: str, num_nodes: int) -> tuple[int, float, str]:
+    import objects
+
+    start = time.perf_counter()
+    count = sum(1 for _ in getattr(objects, family)(num_nodes).iter_graph6())
+    return count, time.perf_counter() - start, "graphs/s"
+
+
+def bench_random_bipartite(num_nodes: int, count: int = 500) -> tuple[int, float, str]:
+    from objects import RandomBalancedBipartiteGraph
+
+    start = time.perf_counter()
+    for seed in range(count):
+        RandomBalancedBipartiteGraph(num_nodes, 0.5, seed=seed)
+    return count, time.perf_counter() - start, "graphs/s"
+
+
+def bench_random_search(num_nodes: int, count: int = 100_000) -> tuple[int, float, str]:
+    from random_search import random_search
+
+    start = time.perf_counter()
+    random_search(num_nodes, count, seed=0)
+    return count, time.perf_counter() - start, "graphs/s"
+
+
+def bench_anneal(steps: int = 2000) -> tuple[int, float, str]:
+    from sa import GPNOptimizer
+
+    graphs = [nx.from_graph6_bytes(line) for line in FIXTURES["sa25-30"]()]
+    start = time.perf_counter()
+    for seed, graph in enumerate(graphs):
+        opt = GPNOptimizer(graph, seed=seed)
+        opt.steps, opt.Tmax, opt.Tmin, opt.updates = steps, 5.0, 1e-3, 0
+        opt.anneal()
+    return steps * len(graphs), time.perf_counter() - start, "steps/s"
+
+
+# benchmark name -> zero-argument callable returning (operations, seconds, unit)
+BENCHMARKS = {
+    **{f"gpn/{name}": (lambda name=name: bench_gpn(name)) for name in FIXTURES},
+    **{f"gpn_orbits/{name}": (lambda name=name: bench_gpn_orbits(name)) for name in FIXTURES},
+    **{f"gpn_batch/{name}": (lambda name=name: bench_gpn_batch(name)) for name in FIXTURES},
+    # sizes the pure-Python generator backend still handles in seconds
+    "generator/BipartiteGraphs": lambda: bench_generator("BipartiteGraphs", 8),
+    "generator/CubicGraphs": lambda: bench_generator("CubicGraphs", 10),
+    "generator/TriangleFreeGraphs": lambda: bench_generator("TriangleFreeGraphs", 8),
+    "random_bipartite/n20": lambda: bench_random_bipartite(20),
+    "random_bipartite/n30": lambda: bench_random_bipartite(30),
+    "random_search/n30": lambda: bench_random_search(30),
+    "anneal/sa25-30": bench_anneal,
+}
+
+
+def run(names: list[str] | None = None, repeat: int = 3) -> dict:
+    """time every selected benchmark `repeat` times and keep the best rate"""
+
+    selected = [name for name in BENCHMARKS if names is None or any(part in name for part in names)]
+    results = {}
+    for name in selected:
+        best = None
+        for _ in range(repeat):
+            random.seed(0)
+            operations, seconds, unit = BENCHMARKS[name]()
+            if best is None or seconds < best[1]:
+                best = (operations, seconds, unit)
+        operations, seconds, unit = best
+        results[name] = {"rate": operations / seconds, "unit": unit, "operations": operations, "seconds": seconds}
+        print(f"{name:32s} {operations / seconds:14.1f} {unit}", file=sys.stderr)
+
+    return {"meta": _metadata(repeat), "results": results}
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[str]:
+    """names of benchmarks whose rate dropped by more than `threshold` (a fraction)"""
+
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:32s} {'new':>10s}")
+            continue
+        change = result["rate"] / reference["rate"] - 1.0
+        flag = "REGRESSION" if change < -threshold else ""
+        print(f"{name:32s} {reference['rate']:14.1f} -> {result['rate']:14.1f} {result['unit']:9s} {change:+7.1%} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def _metadata(repeat: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "networkx": nx.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "generator_backend": resolve_backend(),
+        "repeat": repeat,
+    }
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="gpn benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks and write a JSON report")
+    run_parser.add_argument("--only", action="append", help="run benchmarks whose name contains this")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", help="report path (default: data/bench/<timestamp>.json)")
+    run_parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="allowed slowdown as a fraction (default 0.10)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+
+    if args.command == "run":
+        if args.list:
+            print("\n".join(BENCHMARKS))
+            sys.exit(0)
+        report = run(args.only, args.repeat)
+        output = Path(args.output) if args.output else \
+            DEFAULT_OUTPUT_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2) + "\n")
+        print(output)
+    else:
+        baseline = json.loads(Path(args.baseline).read_text())
+        current = json.loads(Path(args.current).read_text())
+        regressions = compare(baseline, current, args.threshold)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,191 @@
+import csv
+import sqlite3
+import networkx as nx
+from pathlib import Path
+from collections import OrderedDict
+
+from canonical import canonical_graph6
+from graph6 import HEADER
+from utils import gpn
+
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+DEFAULT_PATH = DATA_DIR / "cache" / "gpn_cache.sqlite"
+
+# (encoding column, gpn column) pairs used by the result tables in data/generated
+CSV_COLUMNS = (
+    ("graph6_encoding", "gpn_num"),
+    ("id", "gpn_num"),
+    ("graph6_label", "gpn_score"),
+)
+
+
+class GPNCache:
+    """gpn values keyed by canonical graph6, shared across labelings, runs and processes
+
+    lookups go through an in-memory LRU tier first and an SQLite store second;
+    values are stored with trivial paths counted and adjusted for `count_trivial`.
+    graphs whose canonical search is too expensive fall back to a labeled key,
+    which is still exact but only hits for the same labeling
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = DEFAULT_PATH,
+        maxsize: int = 100_000
+    ):
+        if not isinstance(maxsize, int) or maxsize < 0:
+            raise ValueError("maxsize must be a non-negative integer")
+
+        self.path = Path(path) if path is not None else None
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path) if self.path is not None else ":memory:")
+        self._db.execute("CREATE TABLE IF NOT EXISTS gpn (graph6 TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, signature TEXT NOT NULL)")
+        self._db.commit()
+
+    def __repr__(self) -> str:
+        return f"GPNCache(path={str(self.path)!r}, size={len(self)}, {self.report()})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM gpn").fetchone()[0]
+
+    def __contains__(self, G: nx.Graph) -> bool:
+        key = self.key(G)
+        return key in self._memory or self._load(key) is not None
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def key(G: nx.Graph) -> str:
+        try:
+            return canonical_graph6(G)
+        except RuntimeError:
+            return "labeled:" + nx.to_graph6_bytes(G, header=False).decode().strip()
+
+    def gpn(self, G: nx.Graph, count_trivial: bool = True) -> int:
+        """cached `utils.gpn`"""
+
+        key = self.key(G)
+        value = self._memory.get(key)
+
+        if value is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+        else:
+            value = self._load(key)
+            if value is not None:
+                self.stats["disk_hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                value = gpn(G)
+                self._store([(key, value)])
+            self._remember(key, value)
+
+        return value if count_trivial else value - G.number_of_nodes()
+
+    def report(self) -> str:
+        lookups = sum(self.stats.values())
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        rate = hits / lookups if lookups else 0.0
+        return (
+            f"memory_hits={self.stats['memory_hits']}, disk_hits={self.stats['disk_hits']}, "
+            f"misses={self.stats['misses']}, hit_rate={rate:.1%}"
+        )
+
+    def prefill(self, paths: list[str | Path] | None = None) -> int:
+        """import known gpn values from result csv files (default: data/generated/*.csv)
+
+        files are remembered by size and mtime, so unchanged files are skipped on
+        later runs; returns the number of rows imported
+        """
+
+        if paths is None:
+            paths = sorted((DATA_DIR / "generated").glob("*.csv"))
+
+        imported = 0
+        for path in map(Path, paths):
+            stat = path.stat()
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+            known = self._db.execute("SELECT signature FROM sources WHERE path = ?", (str(path),)).fetchone()
+            if known is not None and known[0] == signature:
+                continue
+
+            rows = []
+            for encoding, value in _read_gpn_csv(path):
+                graph = nx.from_graph6_bytes(encoding.encode())
+                rows.append((self.key(graph), value))
+                if len(rows) == 10_000:
+                    self._store(rows)
+                    imported += len(rows)
+                    rows = []
+            self._store(rows)
+            imported += len(rows)
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO sources (path, signature) VALUES (?, ?)", (str(path), signature)
+            )
+            self._db.commit()
+
+        return imported
+
+    def _load(self, key: str) -> int | None:
+        row = self._db.execute("SELECT value FROM gpn WHERE graph6 = ?", (key,)).fetchone()
+        return int(row[0]) if row is not None else None
+
+    def _store(self, rows: list[tuple[str, int]]) -> None:
+        # values are text so path counts beyond 64 bits survive
+        self._db.executemany(
+            "INSERT OR IGNORE INTO gpn (graph6, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in rows]
+        )
+        self._db.commit()
+
+    def _remember(self, key: str, value: int) -> None:
+        if self.maxsize == 0:
+            return
+        self._memory[key] = value
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+
+def _read_gpn_csv(path: Path):
+    """yield (graph6, gpn) pairs from any of the project's result table layouts"""
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        columns = next(
+            (pair for pair in CSV_COLUMNS if set(pair) <= set(reader.fieldnames or ())),
+            None
+        )
+        if columns is None:
+            return
+
+        encoding_column, value_column = columns
+        for row in reader:
+            encoding = row[encoding_column].strip()
+            if encoding.startswith(HEADER.decode()):
+                encoding = encoding[len(HEADER):]
+            if encoding and row[value_column]:
+                yield encoding, int(row[value_column])
+
+
+_default_cache = None
+
+
+def cached_gpn(G: nx.Graph, count_trivial: bool = True) -> int:
+    """`utils.gpn` backed by the shared on-disk cache (opened on first use)"""
+
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GPNCache()
+    return _default_cache.gpn(G, count_trivial)
@@ -0,0 +1,540 @@
+import networkx as nx
+from collections import deque
+
+from graph6 import encode_graph6, iter_bits
+
+
+MAX_LEAVES = 20000
+SEARCH_CAP = 1
+
+
+class CanonicalSearch:
+    """canonical labeling of a simple graph by individualization-refinement
+
+    cells of an equitable partition are split by individualizing one vertex at a
+    time; every discrete partition is a relabeling, and the one with the smallest
+    relabeled adjacency is canonical. leaves with equal adjacency reveal
+    automorphisms, which prune children in the same orbit of the pointwise
+    stabilizer of the current prefix (sound, and enough to keep highly
+    symmetric graphs such as K_{n,n} polynomial)
+    """
+
+    def __init__(self, G: nx.Graph, max_leaves: int = MAX_LEAVES):
+        nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+
+        adj = [0] * len(nodes)
+        for u, v in G.edges():
+            if u != v:
+                adj[index[u]] |= 1 << index[v]
+                adj[index[v]] |= 1 << index[u]
+
+        self._start(nodes, adj, max_leaves)
+
+    @classmethod
+    def from_bitsets(cls, adj: list[int], max_leaves: int = MAX_LEAVES) -> "CanonicalSearch":
+        """search on adjacency bit rows directly; nodes are 0..n-1"""
+
+        search = cls.__new__(cls)
+        search._start(list(range(len(adj))), list(adj), max_leaves)
+        return search
+
+    def _start(self, nodes: list, adj: list[int], max_leaves: int) -> None:
+        self.nodes = nodes
+        self.n = len(nodes)
+        self.adj = adj
+
+        self.max_leaves = max_leaves
+        self.num_leaves = 0
+        self.generators: list[list[int]] = []
+
+        self._first = None  # (certificate, permutation) of the first leaf
+        self._best = None   # (certificate, permutation) of the smallest leaf
+
+        if self.n:
+            self._search(refine(self.adj, [list(range(self.n))]), [])
+
+    @property
+    def labeling(self) -> list:
+        """nodes of the graph in canonical order"""
+
+        if not self.n:
+            return []
+        return [self.nodes[v] for v in self._best[1]]
+
+    @property
+    def certificate(self) -> tuple[int, ...]:
+        """adjacency bit rows of the canonically relabeled graph"""
+
+        return self._best[0] if self.n else ()
+
+    def graph6(self) -> str:
+        return encode_graph6(list(self.certificate), self.n)
+
+    def orbits(self) -> list[list]:
+        """vertex orbits under the automorphisms found during the search"""
+
+        parent = list(range(self.n))
+        for gamma in self.generators:
+            for v in range(self.n):
+                _union(parent, v, gamma[v])
+
+        groups: dict[int, list] = {}
+        for v in range(self.n):
+            groups.setdefault(_find(parent, v), []).append(self.nodes[v])
+        return list(groups.values())
+
+    def _search(self, cells: list[list[int]], prefix: list[int]) -> int:
+        """explore the subtree below `prefix`; returns the depth to jump back to"""
+
+        target = next((cell for cell in cells if len(cell) > 1), None)
+        if target is None:
+            return self._leaf([cell[0] for cell in cells], prefix)
+
+        position = cells.index(target)
+        explored = []
+        # orbits of the automorphisms found so far that fix the prefix pointwise
+        parent, absorbed = list(range(self.n)), 0
+        for v in sorted(target):
+            for gamma in self.generators[absorbed:]:
+                if all(gamma[p] == p for p in prefix):
+                    for w in range(self.n):
+                        _union(parent, w, gamma[w])
+            absorbed = len(self.generators)
+
+            root = _find(parent, v)
+            if any(_find(parent, w) == root for w in explored):
+                continue
+            explored.append(v)
+
+            # the parent partition is equitable, so the new singleton is the only splitter
+            child = cells[:position] + [[v], [w for w in target if w != v]] + cells[position + 1:]
+            depth = self._search(refine(self.adj, child, [1 << v]), prefix + [v])
+            if depth < len(prefix):
+                return depth
+
+        return len(prefix)
+
+    def _leaf(self, permutation: list[int], prefix: list[int]) -> int:
+        self.num_leaves += 1
+        if self.num_leaves > self.max_leaves:
+            raise RuntimeError(f"canonical search exceeded {self.max_leaves} leaves")
+
+        position = [0] * self.n
+        for i, v in enumerate(permutation):
+            position[v] = i
+        certificate = tuple(
+            sum(1 << position[w] for w in iter_bits(self.adj[v]))
+            for v in permutation
+        )
+
+        if self._first is None:
+            self._first = self._best = (certificate, permutation)
+            self._first_prefix = prefix
+            return len(prefix)
+
+        for reference in (self._first, self._best):
+            if certificate == reference[0]:
+                # reference[1][i] -> permutation[i] preserves adjacency
+                gamma = [0] * self.n
+                for a, b in zip(reference[1], permutation):
+                    gamma[a] = b
+                self.generators.append(gamma)
+
+                if reference is self._first:
+                    # the automorphism maps the (fully explored) first subtree onto the
+                    # current one, so jump back to where the two paths diverge
+                    common = 0
+                    while common < len(prefix) and prefix[common] == self._first_prefix[common]:
+                        common += 1
+                    return common
+                return len(prefix)
+
+        if certificate < self._best[0]:
+            self._best = (certificate, permutation)
+        return len(prefix)
+
+
+def refine(adj: list[int], cells: list[list[int]], splitters: list[int] | None = None) -> list[list[int]]:
+    """coarsest equitable refinement of an ordered partition (labeling invariant)
+
+    cells are split by the number of neighbours their vertices have in each
+    splitter cell and the parts are ordered by that count, so isomorphic inputs
+    end up with corresponding partitions; new parts become splitters themselves.
+    `splitters` defaults to every cell; pass only the changed cells when the
+    rest of the partition is already equitable
+    """
+
+    cells = [list(cell) for cell in cells]
+    if splitters is None:
+        splitters = [sum(1 << v for v in cell) for cell in cells]
+    queue = deque(splitters)
+
+    while queue and len(cells) < len(adj):
+        mask = queue.popleft()
+        refined = []
+        for cell in cells:
+            if len(cell) == 1:
+                refined.append(cell)
+                continue
+            parts: dict[int, list[int]] = {}
+            for v in cell:
+                parts.setdefault((adj[v] & mask).bit_count(), []).append(v)
+            if len(parts) == 1:
+                refined.append(cell)
+                continue
+            for count in sorted(parts):
+                refined.append(parts[count])
+                queue.append(sum(1 << v for v in parts[count]))
+        cells = refined
+
+    return cells
+
+
+def canonical_graph6(G: nx.Graph, max_leaves: int = MAX_LEAVES) -> str:
+    """graph6 encoding of the canonical relabeling; equal for isomorphic graphs"""
+
+    return CanonicalSearch(G, max_leaves).graph6()
+
+
+def automorphism_orbits(G: nx.Graph, max_leaves: int = MAX_LEAVES) -> list[list]:
+    """vertex orbits of Aut(G), using Sage when it is installed
+
+    the pure-Python fallback only merges vertices related by automorphisms it
+    actually found, so its orbits can be finer than the true ones but never coarser;
+    if the search runs out of leaves every vertex becomes its own orbit
+    """
+
+    try:
+        from sage.all import Graph
+    except ImportError:
+        Graph = None
+
+    if Graph is not None:
+        _, orbits = Graph(G).automorphism_group(orbits=True)
+        return [list(orbit) for orbit in orbits]
+
+    adj_index = {node: i for i, node in enumerate(G.nodes())}
+    adj = [0] * len(adj_index)
+    for u, v in G.edges():
+        if u != v:
+            adj[adj_index[u]] |= 1 << adj_index[v]
+            adj[adj_index[v]] |= 1 << adj_index[u]
+
+    # a discrete equitable partition means no non-trivial automorphism is possible
+    if len(refine(adj, [list(range(len(adj)))])) == len(adj):
+        return [[node] for node in G.nodes()]
+
+    try:
+        return CanonicalSearch(G, max_leaves).orbits()
+    except RuntimeError:
+        return [[node] for node in G.nodes()]
+
+
+def symmetry_classes(G: nx.Graph, max_scans: int | None = None) -> list[list]:
+    """cheap partition of the nodes into classes that each lie inside one Aut(G) orbit
+
+    twins (equal open or closed neighbourhoods) are swapped by a transposition,
+    so they are merged for free. the remaining nodes are coloured by degree and
+    by the sizes of their balls of radius 2 and 3, then refined to the equitable
+    partition; every cell is a union of orbits, so a cell holding one class is
+    exactly one orbit and asymmetric graphs usually end there. in the other
+    cells each class is matched against the cell's orbit representatives by
+    extending v -> w along a BFS order from v, which builds a whole automorphism
+    whose cycles are all merged. a candidate costs about one adjacency scan, so
+    one pair may try `SEARCH_CAP` BFS passes worth of candidates and the whole
+    search `max_scans` (default: an eighth of what `gpn` scans, capped by the
+    passes merging every open class would save, refunded a pass per merge).
+    classes are never coarser than the orbits, only finer when the budget runs
+    out, which large-girth graphs such as cages can do
+    """
+
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    n = len(nodes)
+    neighbours = [[index[w] for w in G.adj[node] if w != node] for node in nodes]
+    adj = [0] * n
+    for v, row in enumerate(neighbours):
+        for w in row:
+            adj[v] |= 1 << w
+
+    parent = list(range(n))
+    for rows in (adj, [row | 1 << v for v, row in enumerate(adj)]):
+        first: dict[int, int] = {}
+        for v, row in enumerate(rows):
+            twin = first.setdefault(row, v)
+            if twin != v:
+                _union(parent, twin, v)
+
+    def open_cells(cells) -> list[list[int]]:
+        return [cell for cell in cells if len(cell) > 1 and len({_find(parent, v) for v in cell}) > 1]
+
+    degrees: dict[int, list[int]] = {}
+    for v, row in enumerate(neighbours):
+        degrees.setdefault(len(row), []).append(v)
+
+    bfs_scans = sum(map(len, neighbours))  # one BFS reads every adjacency list once
+    cells = open_cells(degrees.values())
+    if cells:
+        profiles = _ball_profiles(adj, neighbours, radii=(2, 3))
+        colours: dict[tuple, list[int]] = {}
+        for v, row in enumerate(neighbours):
+            colours.setdefault((len(row), *profiles[v]), []).append(v)
+        search = _OrbitSearch(adj, neighbours, [colours[colour] for colour in sorted(colours)])
+        cells = open_cells(search.cells())
+        savings = sum(len({_find(parent, v) for v in cell}) - 1 for cell in cells)
+        search.budget = bfs_scans * min(n // 8, savings) if max_scans is None else max_scans
+    cap = SEARCH_CAP * bfs_scans
+    try:
+        for cell in cells:
+            representatives = [cell[0]]
+            for v in cell[1:]:
+                if any(_find(parent, v) == _find(parent, r) for r in representatives):
+                    continue
+                for r in representatives:
+                    gamma = search.automorphism(r, v, cap)
+                    if gamma is not None:
+                        for w, image in enumerate(gamma):
+                            if w != image and _union(parent, w, image):
+                                search.budget += bfs_scans
+                        break
+                else:
+                    representatives.append(v)
+                    continue
+                if len({_find(parent, w) for w in cell}) == 1:
+                    break
+    except _BudgetExhausted:
+        pass
+
+    groups: dict[int, list] = {}
+    for v in range(n):
+        groups.setdefault(_find(parent, v), []).append(nodes[v])
+    return list(groups.values())
+
+
+def _ball_profiles(adj: list[int], neighbours: list[list[int]], radii: tuple[int, ...]) -> list[tuple[int, ...]]:
+    """sizes of every vertex's balls of the given radii, grown for all vertices at once"""
+
+    balls = [row | 1 << v for v, row in enumerate(adj)]
+    profiles: list[tuple[int, ...]] = [()] * len(adj)
+    for radius in range(2, max(radii, default=1) + 1):
+        grown = []
+        for v, ball in enumerate(balls):
+            for w in neighbours[v]:
+                ball |= balls[w]
+            grown.append(ball)
+        balls = grown
+        if radius in radii:
+            profiles = [profile + (ball.bit_count(),) for profile, ball in zip(profiles, balls)]
+    return profiles
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class _OrbitSearch:
+    """automorphisms mapping one vertex onto another, found by backtracking along a BFS order
+
+    vertices are coloured by the coarsest equitable partition finer than `cells`,
+    kept nauty-style: `lab` lists the vertices cell by cell, a cell is named by its
+    start position, `size[p]` is the size of the cell starting at p (0 inside
+    cells) and `cell[v]` the start of v's cell. a map a -> b is extended vertex by
+    vertex in BFS order from a; each vertex goes to a vertex of its colour whose
+    already-mapped neighbours are exactly the images of its own, so a complete map
+    is an automorphism. one candidate costs about one adjacency entry of a BFS and
+    is charged to `budget`
+    """
+
+    def __init__(self, adj: list[int], neighbours: list[list[int]], cells: list[list[int]], budget: int = 0):
+        self.adj = adj
+        self.neighbours = neighbours
+        self.budget = budget  # candidates the searches may still try
+        self._plans: dict[int, tuple[list[int], list[list[int]]]] = {}
+
+        lab, size, cell, starts = [], [0] * len(adj), [0] * len(adj), []
+        for members in cells:
+            starts.append(len(lab))
+            size[len(lab)] = len(members)
+            for v in members:
+                cell[v] = len(lab)
+            lab.extend(members)
+        # a single cell is already equitable when the graph is regular
+        if len(cells) > 1 or len(set(map(len, neighbours))) > 1:
+            self._refine(lab, size, cell, starts)
+        self.root = (lab, size, cell)
+
+    def cells(self) -> list[list[int]]:
+        """cells of the equitable partition the colours come from"""
+
+        lab, size, _ = self.root
+        return [lab[p:p + s] for p, s in enumerate(size) if s]
+
+    def automorphism(self, a: int, b: int, cap: int | None = None) -> list[int] | None:
+        """an automorphism with a -> b, or None if there is none (or none within `cap` candidates)"""
+
+        adj, neighbours, colour = self.adj, self.neighbours, self.root[2]
+        if colour[a] != colour[b]:
+            return None
+        order, earlier = self._plan(a)
+
+        n = len(order)
+        gamma, inverse = [-1] * n, [-1] * n
+        gamma[a], inverse[b], image = b, a, 1 << b
+        candidates: list = [None] * n
+        required = [0] * n  # images of the earlier neighbours of order[i]
+        tried = 0
+
+        i = 1
+        while 0 < i < n:
+            x = order[i]
+            if candidates[i] is None:
+                mask = 0
+                for p in earlier[i]:
+                    mask |= 1 << gamma[p]
+                required[i] = mask
+                candidates[i] = iter(neighbours[gamma[earlier[i][0]]] if earlier[i] else range(n))
+            else:
+                # backtracked to x: release its current image and try the next one
+                y = gamma[x]
+                gamma[x], inverse[y] = -1, -1
+                image ^= 1 << y
+
+            mask, c = required[i], colour[x]
+            start = tried
+            for y in candidates[i]:
+                tried += 1
+                if inverse[y] < 0 and colour[y] == c and adj[y] & image == mask:
+                    gamma[x], inverse[y] = y, x
+                    image |= 1 << y
+                    i += 1
+                    break
+            else:
+                candidates[i] = None
+                i -= 1
+
+            self.budget -= tried - start
+            if self.budget <= 0:
+                raise _BudgetExhausted
+            if cap is not None and tried > cap:
+                return None
+
+        return gamma if i == n else None
+
+    def _plan(self, a: int) -> tuple[list[int], list[list[int]]]:
+        """BFS order from `a` (then from each unreached vertex) and every vertex's neighbours earlier in it"""
+
+        if a not in self._plans:
+            neighbours = self.neighbours
+            rank = [-1] * len(neighbours)
+            order = []
+            for root in [a, *range(len(neighbours))]:
+                if rank[root] >= 0:
+                    continue
+                k = rank[root] = len(order)
+                order.append(root)
+                while k < len(order):
+                    for w in neighbours[order[k]]:
+                        if rank[w] < 0:
+                            rank[w] = len(order)
+                            order.append(w)
+                    k += 1
+            earlier = [[p for p in neighbours[v] if rank[p] < rank[v]] for v in order]
+            self._plans[a] = (order, earlier)
+        return self._plans[a]
+
+    def _refine(self, lab: list, size: list, cell: list, queue: list[int]) -> None:
+        """refine in place to the coarsest equitable partition finer than this one
+
+        only the neighbours of each splitter and the cells they touch are visited,
+        so a refinement costs about the edges it crosses rather than O(n) per splitter
+        """
+
+        n = len(lab)
+        neighbours = self.neighbours
+        position = sorted(range(n), key=lab.__getitem__)  # position[v]: index of v in lab
+        pending = set(queue)
+        queue = deque(queue)
+        num_cells = n - size.count(0)
+
+        while queue and num_cells < n:
+            splitter = queue.popleft()
+            pending.discard(splitter)
+
+            reached = []
+            for u in lab[splitter:splitter + size[splitter]]:
+                reached += neighbours[u]
+            # counts are only needed when some vertex is reached more than once;
+            # otherwise every touched cell splits in two
+            counts = None
+            if len(set(reached)) < len(reached):
+                counts = {}
+                for w in reached:
+                    counts[w] = counts.get(w, 0) + 1
+                reached = counts
+
+            touched: dict[int, list[int]] = {}
+            for w in reached:
+                start = cell[w]
+                if size[start] > 1:
+                    if start in touched:
+                        touched[start].append(w)
+                    else:
+                        touched[start] = [w]
+
+            for start in sorted(touched):
+                members, end = touched[start], start + size[start]
+                uniform = counts is None or len(set(map(counts.__getitem__, members))) == 1
+                if uniform and len(members) == size[start]:
+                    continue
+
+                # touched vertices move to the back of the cell, ordered by count
+                back = end
+                for w in members:
+                    back -= 1
+                    i, other = position[w], lab[back]
+                    lab[i], lab[back] = other, w
+                    position[other], position[w] = i, back
+                if uniform:
+                    parts = [start, back]
+                else:
+                    lab[back:end] = sorted(lab[back:end], key=counts.__getitem__)
+                    for i in range(back, end):
+                        position[lab[i]] = i
+                    # parts: the untouched vertices (count 0), then one part per count
+                    parts = [start] if back > start else []
+                    parts += [i for i in range(back, end) if i == back or counts[lab[i]] != counts[lab[i - 1]]]
+
+                bounds = parts + [end]
+                size[start] = bounds[1] - start
+                for p, q in zip(bounds[1:], bounds[2:]):
+                    size[p] = q - p
+                    for w in lab[p:q]:
+                        cell[w] = p
+                num_cells += len(parts) - 1
+
+                if start in pending:
+                    fresh = parts
+                else:
+                    largest = max(parts, key=size.__getitem__)
+                    fresh = [p for p in parts if p != largest]
+                for p in fresh:
+                    if p not in pending:
+                        pending.add(p)
+                        queue.append(p)
+
+
+
+def _find(parent: list[int], v: int) -> int:
+    while parent[v] != v:
+        parent[v] = parent[parent[v]]
+        v = parent[v]
+    return v
+
+
+def _union(parent: list[int], a: int, b: int) -> bool:
+    root_a, root_b = _find(parent, a), _find(parent, b)
+    if root_a == root_b:
+        return False
+    parent[max(root_a, root_b)] = min(root_a, root_b)
+    return True
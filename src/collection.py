@@ -0,0 +1,180 @@
+import json
+import numpy as np
+import networkx as nx
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from graph6 import MAX_NODES, encode_graph6, iter_bits, iter_graph6_chunks
+from utils import gpn_batch
+
+
+META_FILE = "meta.json"
+COLUMNS = ("bitsets", "num_edges", "gpn", "graph_class")
+
+# gpn of graphs that were never scored
+MISSING_GPN = -1
+
+
+class GraphCollection:
+    """same-order graphs as one contiguous array of packed adjacency bitsets
+
+    row i of graph g is `bitsets[g, i]` (bit j set <=> edge ij), stored in the
+    smallest unsigned integer type that holds `num_nodes` bits, next to the
+    metadata columns `num_edges`, `gpn` (`MISSING_GPN` until scored) and
+    `graph_class` (codes into `classes`). integer indexing returns an
+    `nx.Graph` built on demand; slicing returns a collection that shares the
+    arrays, so slices of a memory-mapped collection never copy
+    """
+
+    def __init__(
+        self,
+        num_nodes: int,
+        bitsets: np.ndarray,
+        num_edges: np.ndarray | None = None,
+        gpn: np.ndarray | None = None,
+        graph_class: np.ndarray | None = None,
+        classes: tuple[str, ...] = ()
+    ):
+        if not isinstance(num_nodes, int) or not 0 <= num_nodes <= MAX_NODES:
+            raise ValueError(f"num_nodes must be an integer between 0 and {MAX_NODES}")
+        if bitsets.ndim != 2 or bitsets.shape[1] != num_nodes:
+            raise ValueError("bitsets must have shape (num_graphs, num_nodes)")
+
+        self.num_nodes = num_nodes
+        self.bitsets = bitsets if bitsets.dtype == _row_dtype(num_nodes) else bitsets.astype(_row_dtype(num_nodes))
+        self.num_edges = num_edges if num_edges is not None else _count_edges(self.bitsets)
+        self.gpn = gpn if gpn is not None else np.full(len(bitsets), MISSING_GPN, dtype=np.int64)
+        self.graph_class = graph_class if graph_class is not None else np.zeros(len(bitsets), dtype=np.uint8)
+        self.classes = tuple(classes)
+
+        if not len(self.num_edges) == len(self.gpn) == len(self.graph_class) == len(self.bitsets):
+            raise ValueError("every metadata column needs one entry per graph")
+
+    def __repr__(self) -> str:
+        return f"GraphCollection(num_nodes={self.num_nodes}, num_graphs={len(self)}, nbytes={self.nbytes})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __len__(self) -> int:
+        return len(self.bitsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.to_networkx(index)
+        # slices give views; masks and index arrays copy
+        return GraphCollection(
+            self.num_nodes,
+            self.bitsets[index],
+            self.num_edges[index],
+            self.gpn[index],
+            self.graph_class[index],
+            self.classes,
+        )
+
+    def __iter__(self) -> Iterator[nx.Graph]:
+        for index in range(len(self)):
+            yield self.to_networkx(index)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, column).nbytes for column in COLUMNS)
+
+    @classmethod
+    def from_graph6(
+        cls,
+        encodings: Iterable[str | bytes],
+        graph_class: str | None = None,
+        chunk_size: int = 1 << 16
+    ) -> "GraphCollection":
+        """decode same-order graph6 encodings (or a graph6 file path) chunk by chunk"""
+
+        blocks, num_nodes = [], None
+        for chunk in iter_graph6_chunks(encodings, chunk_size=chunk_size):
+            if num_nodes is not None and chunk.num_nodes != num_nodes:
+                raise ValueError("a GraphCollection holds graphs of one order")
+            num_nodes = chunk.num_nodes
+            blocks.append((chunk.indices, chunk.bitsets.astype(_row_dtype(num_nodes)), chunk.num_edges))
+
+        if num_nodes is None:
+            raise ValueError("no graphs to collect")
+
+        total = sum(len(indices) for indices, _, _ in blocks)
+        bitsets = np.empty((total, num_nodes), dtype=_row_dtype(num_nodes))
+        num_edges = np.empty(total, dtype=np.uint16)
+        for indices, rows, edges in blocks:
+            bitsets[indices] = rows
+            num_edges[indices] = edges
+
+        classes = (graph_class,) if graph_class is not None else ()
+        return cls(num_nodes, bitsets, num_edges, classes=classes)
+
+    @classmethod
+    def from_graphs(cls, graphs: Iterable[nx.Graph], graph_class: str | None = None) -> "GraphCollection":
+        return cls.from_graph6(
+            (nx.to_graph6_bytes(graph, nodes=sorted(graph.nodes()), header=False).strip() for graph in graphs),
+            graph_class,
+        )
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> "GraphCollection":
+        """open a collection written by `save`; with `mmap` the columns stay on disk"""
+
+        path = Path(path)
+        meta = json.loads((path / META_FILE).read_text())
+        mode = "r" if mmap else None
+        columns = {column: np.load(path / f"{column}.npy", mmap_mode=mode) for column in COLUMNS}
+        return cls(meta["num_nodes"], classes=meta["classes"], **columns)
+
+    def save(self, path: str | Path) -> None:
+        """one .npy file per column plus a small json header, all memory-mappable"""
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for column in COLUMNS:
+            np.save(path / f"{column}.npy", np.ascontiguousarray(getattr(self, column)))
+        (path / META_FILE).write_text(json.dumps({
+            "num_nodes": self.num_nodes, "num_graphs": len(self), "classes": list(self.classes)
+        }) + "\n")
+
+    def score(self, batch_size: int = 4096) -> np.ndarray:
+        """fill the gpn column with `gpn_batch` (in place) and return it"""
+
+        if not self.gpn.flags.writeable:
+            self.gpn = np.array(self.gpn)
+        for start in range(0, len(self), batch_size):
+            rows = np.asarray(self.bitsets[start:start + batch_size], dtype=np.uint64)
+            self.gpn[start:start + len(rows)] = gpn_batch(rows)
+        return self.gpn
+
+    def graph6(self, index: int) -> str:
+        return encode_graph6([int(row) for row in self.bitsets[index]], self.num_nodes)
+
+    def to_networkx(self, index: int) -> nx.Graph:
+        graph = nx.Graph()
+        graph.add_nodes_from(range(self.num_nodes))
+        rows = [int(row) for row in self.bitsets[index]]
+        graph.add_edges_from((i, j) for i, row in enumerate(rows) for j in iter_bits(row >> (i + 1) << (i + 1)))
+        return graph
+
+    def class_of(self, index: int) -> str | None:
+        return self.classes[self.graph_class[index]] if self.classes else None
+
+    def adjacency(self, index: int) -> np.ndarray:
+        """dense 0/1 uint8 adjacency matrix of one graph"""
+
+        shifts = np.arange(self.num_nodes, dtype=np.uint64)
+        return ((self.bitsets[index].astype(np.uint64)[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+def _row_dtype(num_nodes: int) -> np.dtype:
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if num_nodes <= np.iinfo(dtype).bits:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def _count_edges(bitsets: np.ndarray) -> np.ndarray:
+    # every edge sets one bit in each of its two rows
+    bits = np.unpackbits(np.ascontiguousarray(bitsets).view(np.uint8), axis=1)
+    return (bits.sum(axis=1, dtype=np.int64) // 2).astype(np.uint16)
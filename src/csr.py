@@ -0,0 +1,160 @@
+import os
+import numpy as np
+import networkx as nx
+from typing import NamedTuple
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+# frontier counts are promoted to Python ints before they can pass this
+INT64_LIMIT = 2 ** 63 - 1
+
+# dense (num_nodes, batch) work arrays are kept below this many entries
+MAX_BATCH_ENTRIES = 1 << 22
+
+
+class CSRGraph(NamedTuple):
+    """undirected graph as CSR arrays; `nodes[i]` is the label of row i"""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    nodes: list
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+
+def to_csr(G: nx.Graph) -> CSRGraph:
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+
+    edges = np.array([(index[u], index[v]) for u, v in G.edges() if u != v], dtype=np.int64).reshape(-1, 2)
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    order = np.lexsort((cols, rows))
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(nodes)), out=indptr[1:])
+    return CSRGraph(indptr, cols[order], nodes)
+
+
+def gpn_csr(
+    G: nx.Graph | CSRGraph,
+    count_trivial: bool = True,
+    workers: int | None = None,
+    executor: str = "thread",
+    batch_sources: int | None = None
+) -> int:
+    """`gpn` for large sparse graphs: frontier BFS path counting on CSR arrays
+
+    sources are processed in batches whose BFS levels advance together; a level
+    expands only the current frontier through CSR gathers, so every source costs
+    O(n + m) regardless of the diameter. counts stay in int64 until a level
+    could overflow, after which that batch continues with exact Python ints.
+    batches are spread over a thread or process pool; each worker holds the CSR
+    arrays plus (num_nodes x batch) flag and scratch arrays
+    """
+
+    if executor not in ("thread", "process"):
+        raise ValueError("executor must be 'thread' or 'process'")
+
+    graph = G if isinstance(G, CSRGraph) else to_csr(G)
+    n = graph.num_nodes
+    if n == 0:
+        return 0
+
+    if batch_sources is None:
+        batch_sources = max(1, min(64, MAX_BATCH_ENTRIES // n))
+    batches = [(start, min(start + batch_sources, n)) for start in range(0, n, batch_sources)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(batches) == 1:
+        operator = _operator(graph.indptr, graph.indices)
+        ordered_total = sum(_count_batch(batch, operator) for batch in batches)
+    elif executor == "thread":
+        operator = _operator(graph.indptr, graph.indices)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ordered_total = sum(pool.map(partial(_count_batch, operator=operator), batches))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(graph.indptr, graph.indices)
+        ) as pool:
+            ordered_total = sum(pool.map(_count_batch, batches, chunksize=max(1, len(batches) // (4 * workers))))
+
+    trivial = n if count_trivial else 0
+    return trivial + ordered_total // 2
+
+
+# (indptr, indices, max degree) of the graph a process-pool worker was started with
+_worker_operator = None
+
+
+def _init_worker(indptr: np.ndarray, indices: np.ndarray) -> None:
+    global _worker_operator
+    _worker_operator = _operator(indptr, indices)
+
+
+def _operator(indptr: np.ndarray, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray, int]:
+    return indptr, indices, int(np.diff(indptr).max(initial=0))
+
+
+def _count_batch(batch: tuple[int, int], operator: tuple[np.ndarray, np.ndarray, int] | None = None) -> int:
+    """sum of path counts from sources start..stop-1 to every other node
+
+    the frontier is a flat list of (node, source) slots, key = node * k + source;
+    each level gathers only the CSR rows of frontier nodes, so a level costs
+    O(edges leaving the frontier) and a source O(n + m) overall
+    """
+
+    indptr, indices, max_degree = operator if operator is not None else _worker_operator
+    start, stop = batch
+    n, k = len(indptr) - 1, stop - start
+
+    visited = np.zeros(n * k, dtype=bool)
+    counts_by_key = np.zeros(n * k, dtype=np.int64)  # scratch, zero outside the level being summed
+    first_seen = np.empty(n * k, dtype=np.int64)  # scratch for de-duplicating keys
+
+    columns = np.arange(k, dtype=np.int64)
+    keys = (start + columns) * k + columns
+    counts = np.ones(k, dtype=np.int64)
+    visited[keys] = True
+
+    total = 0
+    while len(keys):
+        if counts.dtype != object and int(counts.max()) * max_degree > INT64_LIMIT:
+            counts = counts.astype(object)
+            counts_by_key = counts_by_key.astype(object)
+
+        # every (neighbour, source) slot one edge away from the frontier
+        nodes, sources = np.divmod(keys, k)
+        row_start = indptr[nodes]
+        degrees = indptr[nodes + 1] - row_start
+        owner = np.repeat(np.arange(len(keys)), degrees)
+        edge = row_start[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+        targets = indices[edge] * k + sources[owner]
+
+        fresh = ~visited[targets]
+        targets, owner = targets[fresh], owner[fresh]
+        np.add.at(counts_by_key, targets, counts[owner])
+
+        # the last write per key wins, so exactly one position per distinct key matches
+        positions = np.arange(len(targets))
+        first_seen[targets] = positions
+        keys = targets[first_seen[targets] == positions]
+
+        counts = counts_by_key[keys]
+        counts_by_key[keys] = 0
+        visited[keys] = True
+        total += _exact_sum(counts)
+
+    return total
+
+
+def _exact_sum(values: np.ndarray) -> int:
+    if values.dtype == object:
+        return int(values.sum())
+    # int64 sums are exact only while the whole level fits
+    if int(values.max(initial=0)) * values.size <= INT64_LIMIT:
+        return int(values.sum())
+    return int(values.astype(object).sum())
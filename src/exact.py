@@ -0,0 +1,316 @@
+import time
+import bisect
+import logging
+import argparse
+import numpy as np
+import networkx as nx
+from functools import lru_cache
+
+from canonical import canonical_graph6
+from graph6 import iter_bits
+from utils import biadjacency_bitsets, gpn_batch
+
+
+class BipartiteBranchAndBound:
+    """exact maximum gpn over connected balanced bipartite graphs
+
+    the biadjacency matrix (`num_nodes // 2` rows, the rest columns) is grown
+    one row at a time. isomorph rejection is orderly: rows are kept in
+    non-increasing order and columns in non-increasing lexicographic order,
+    and every bipartite graph has such a doubly lexical ordering of its
+    biadjacency matrix. a partial matrix is pruned when a provable upper bound
+    on the gpn of every completion falls below the best value found so far;
+    completed matrices are scored in batches with `gpn_batch`
+    """
+
+    def __init__(
+        self,
+        num_nodes: int,
+        lower_bound: int = 0,
+        batch_size: int = 4096,
+        report_every: float = 60.0
+    ):
+        if not isinstance(num_nodes, int) or not 2 <= num_nodes <= 62:
+            raise ValueError("num_nodes must be an integer between 2 and 62")
+
+        self.num_nodes = num_nodes
+        self.num_rows = num_nodes // 2
+        self.num_cols = num_nodes - self.num_rows
+        self.batch_size = batch_size
+        self.report_every = report_every
+
+        self.best_value = lower_bound
+        self.best_matrices: list[tuple[int, ...]] = []
+        self.stats = {"nodes": 0, "pruned": 0, "leaves": 0, "seconds": 0.0}
+
+        self._full = (1 << self.num_cols) - 1
+        self._candidates = {}
+        self._leaves = []
+        self._num_leaves = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"BipartiteBranchAndBound(num_nodes={self.num_nodes}, best_value={self.best_value}, "
+            f"nodes={self.stats['nodes']}, leaves={self.stats['leaves']})"
+        )
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def run(self) -> tuple[int, list[str]]:
+        """search the whole tree; returns the maximum gpn and every optimal graph (canonical graph6)
+
+        graphs below `lower_bound` are never reported, so a lower bound above the
+        true maximum returns no graphs
+        """
+
+        start = self._last_report = time.perf_counter()
+        self._start = start
+
+        # every pair of adjacent columns is still tied before the first row
+        self._search([], 0, (1 << (self.num_cols - 1)) - 1, [0] * self.num_cols)
+        self._flush()
+
+        self.stats["seconds"] = time.perf_counter() - start
+        self._report()
+
+        graphs = sorted({canonical_graph6(_to_graph(rows, self.num_cols)) for rows in self.best_matrices})
+        return self.best_value, graphs
+
+    def upper_bound(self, rows: list[int], col_degrees: list[int]) -> int:
+        """gpn that no completion of the partial biadjacency matrix `rows` can exceed
+
+        every ordered pair is counted from its source: the geodesics leaving a
+        vertex are bounded layer by layer from its degree, the number of 2-paths
+        through its neighbours and the largest degree on each side
+        """
+
+        remaining = self.num_rows - len(rows)
+        row_degrees = [row.bit_count() for row in rows]
+        # later rows come after `rows[-1]` in the orderly order
+        free_row_degree = _max_popcount_below(rows[-1]) if rows and remaining else 0
+        col_caps = [degree + remaining for degree in col_degrees]
+
+        max_row = max(row_degrees + [free_row_degree])
+        max_col = max(col_caps)
+        rows_side, cols_side = self.num_rows, self.num_cols
+
+        total = 0
+        for row, degree in zip(rows, row_degrees):
+            two_paths = sum(col_caps[j] - 1 for j in iter_bits(row))
+            total += _source_bound(degree, degree, two_paths, rows_side, cols_side, max_row, max_col)
+
+        if remaining:
+            total += remaining * _source_bound(
+                1, free_row_degree, free_row_degree * (max_col - 1), rows_side, cols_side, max_row, max_col
+            )
+
+        for j, degree in enumerate(col_degrees):
+            fixed_paths = sum(row_degrees[i] - 1 for i, row in enumerate(rows) if row >> j & 1)
+            total += max(
+                _source_bound(
+                    extra_degree, extra_degree, fixed_paths + (extra_degree - degree) * (free_row_degree - 1),
+                    cols_side, rows_side, max_col, max_row
+                )
+                for extra_degree in range(max(degree, 1), col_caps[j] + 1)
+            )
+
+        return self.num_nodes + total // 2
+
+    def _search(self, rows: list[int], previous: int, ties: int, col_degrees: list[int]) -> None:
+        self.stats["nodes"] += 1
+        if time.perf_counter() - self._last_report > self.report_every:
+            self._report()
+
+        if rows and self.upper_bound(rows, col_degrees) < self.best_value:
+            self.stats["pruned"] += 1
+            return
+
+        candidates = self._valid_rows(ties)
+        if rows:
+            # candidates are sorted in decreasing order; keep those <= the previous row
+            candidates = candidates[bisect.bisect_left(candidates, -previous, key=lambda x: -x):]
+
+        if len(rows) == self.num_rows - 1:
+            self._complete(rows, candidates)
+            return
+
+        for row in candidates:
+            degrees = col_degrees.copy()
+            for j in iter_bits(row):
+                degrees[j] += 1
+            self._search(rows + [row], row, ties & ~(row ^ (row >> 1)), degrees)
+
+    def _complete(self, rows: list[int], candidates: list[int]) -> None:
+        """queue every valid last row that covers all columns and connects the graph"""
+
+        last = np.array(candidates, dtype=np.uint64)
+        covered = 0
+        for row in rows:
+            covered |= row
+        valid = (last | np.uint64(covered)) == np.uint64(self._full)
+
+        # the last row has to meet every component of the rows above it
+        for columns in _component_columns(rows):
+            valid &= (last & np.uint64(columns)) != 0
+
+        last = last[valid]
+        if len(last):
+            block = np.empty((len(last), self.num_rows), dtype=np.uint64)
+            block[:, :-1] = rows
+            block[:, -1] = last
+            self._leaves.append(block)
+            self._num_leaves += len(last)
+            if self._num_leaves >= self.batch_size:
+                self._flush()
+
+    def _valid_rows(self, ties: int) -> list[int]:
+        """non-zero rows (decreasing) that keep every tied pair of adjacent columns ordered
+
+        column j sits at bit `num_cols - 1 - j`, so a row may not set a column
+        while leaving the column before it (one bit higher) clear
+        """
+
+        candidates = self._candidates.get(ties)
+        if candidates is None:
+            candidates = [
+                row for row in range(self._full, 0, -1)
+                if not (row & ~(row >> 1) & ties)
+            ]
+            self._candidates[ties] = candidates
+        return candidates
+
+    def _flush(self) -> None:
+        if not self._leaves:
+            return
+
+        matrices = np.concatenate(self._leaves)
+        # column b of a row mask is bit b
+        columns = (matrices[:, :, None] >> np.arange(self.num_cols, dtype=np.uint64)) & np.uint64(1)
+        values = gpn_batch(biadjacency_bitsets(columns))
+        self.stats["leaves"] += len(matrices)
+
+        top = int(values.max())
+        if top > self.best_value:
+            self.best_value, self.best_matrices = top, []
+        if top == self.best_value:
+            self.best_matrices.extend(
+                tuple(int(row) for row in matrices[i]) for i in np.flatnonzero(values == top)
+            )
+        self._leaves, self._num_leaves = [], 0
+
+    def _report(self) -> None:
+        self._last_report = now = time.perf_counter()
+        elapsed = now - self._start
+        rate = self.stats["nodes"] / elapsed if elapsed else 0.0
+        logging.info(
+            f"n={self.num_nodes}: {self.stats['nodes']} nodes ({rate:.0f}/s), "
+            f"{self.stats['pruned']} pruned, {self.stats['leaves']} leaves, best gpn {self.best_value}"
+        )
+
+
+@lru_cache(maxsize=None)
+def _source_bound(
+    min_degree: int,
+    max_degree: int,
+    two_paths: int,
+    own_side: int,
+    other_side: int,
+    max_own: int,
+    max_other: int
+) -> int:
+    """largest possible number of geodesics leaving a vertex of the `own_side` part
+
+    layer t of the BFS holds at most count(t-1) * (max degree - 1) geodesic ends
+    (each vertex keeps one edge to its parents), and each of its vertices is
+    reached by at most (max path count in t-1) * min(|L(t-1)|, max degree) paths
+    """
+
+    best = 0
+    for degree in range(max(min_degree, 1), max_degree + 1):
+        paths = min(two_paths, degree * (max_other - 1))
+        for second in range(0, own_side):
+            sigma = min(degree, max_own)
+            count = min(paths, second * sigma)
+            tail = _tail(other_side - degree, own_side - 1 - second, second, count, sigma, max_other, max_own)
+            best = max(best, degree + count + tail)
+    return best
+
+
+@lru_cache(maxsize=None)
+def _tail(
+    available: int,
+    after: int,
+    previous_size: int,
+    previous_count: int,
+    previous_sigma: int,
+    max_next: int,
+    max_previous: int
+) -> int:
+    """bound on the geodesics ending in all layers after one of `previous_size` vertices"""
+
+    best = 0
+    if previous_count == 0:
+        return best
+
+    sigma = previous_sigma * min(previous_size, max_next)
+    for size in range(1, available + 1):
+        count = min(size * sigma, previous_count * (max_previous - 1))
+        if count == 0:
+            break
+        best = max(best, count + _tail(after, available - size, size, count, sigma, max_previous, max_next))
+    return best
+
+
+def _max_popcount_below(limit: int) -> int:
+    """largest number of set bits of any positive integer <= limit"""
+
+    best = limit.bit_count()
+    for position in iter_bits(limit):
+        # clear one set bit and fill everything below it
+        best = max(best, (limit >> (position + 1)).bit_count() + position)
+    return best
+
+
+def _component_columns(rows: list[int]) -> list[int]:
+    """column masks of the connected components spanned by `rows`"""
+
+    components = []
+    for row in rows:
+        merged = row
+        for columns in [columns for columns in components if columns & row]:
+            components.remove(columns)
+            merged |= columns
+        components.append(merged)
+    return components
+
+
+def _to_graph(rows: tuple[int, ...], num_cols: int) -> nx.Graph:
+    graph = nx.Graph()
+    graph.add_nodes_from(range(len(rows) + num_cols))
+    graph.add_edges_from((i, len(rows) + b) for i, row in enumerate(rows) for b in iter_bits(row))
+    return graph
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="exact max-gpn search over balanced bipartite graphs")
+    parser.add_argument("num_nodes", type=int)
+    parser.add_argument("--lower-bound", type=int, default=0, help="known gpn value, e.g. from annealing")
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--report-every", type=float, default=60.0, help="seconds between progress lines")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = _parse_args()
+    search = BipartiteBranchAndBound(
+        args.num_nodes,
+        lower_bound=args.lower_bound,
+        batch_size=args.batch_size,
+        report_every=args.report_every,
+    )
+    value, graphs = search.run()
+    print(f"max gpn for n={args.num_nodes}: {value}")
+    for encoding in graphs:
+        print(encoding)
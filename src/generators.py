@@ -0,0 +1,211 @@
+import shutil
+import importlib.util
+import subprocess
+from typing import Iterator
+
+from canonical import CanonicalSearch
+from graph6 import encode_graph6, iter_bits
+
+
+BACKENDS = ("auto", "geng", "sage", "python")
+
+# the pure-Python generator visits every graph below the requested order
+MAX_PYTHON_NODES = 10
+
+
+def iter_graph6(num_nodes: int, args: str = "", backend: str = "auto") -> Iterator[str]:
+    """stream graph6 strings of the graphs `geng num_nodes args` would produce
+
+    backends:
+        "geng"   -- a local geng binary as a streaming subprocess
+        "sage"   -- `graphs.nauty_geng` (Sage is imported only here)
+        "python" -- built-in canonical augmentation, for small `num_nodes` and the
+                    geng options -c, -b, -t, -dN, -DN and res/mod
+        "auto"   -- the first of geng, sage, python that is available
+
+    every backend yields each isomorphism class once; only geng and sage share
+    geng's output order
+    """
+
+    backend = resolve_backend(backend)
+    if backend == "geng":
+        binary = geng_binary()
+        if binary is None:
+            raise RuntimeError("no geng binary on PATH")
+        for line in geng_lines(binary, f"{num_nodes} {args}"):
+            yield line.decode().strip()
+    elif backend == "sage":
+        from sage.all import graphs
+        for graph in graphs.nauty_geng(f"{num_nodes} {args}"):
+            yield graph.graph6_string()
+    else:
+        yield from augment_graph6(num_nodes, args)
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """the concrete backend "auto" stands for on this machine"""
+
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    if backend != "auto":
+        return backend
+    if geng_binary() is not None:
+        return "geng"
+    if _has_sage():
+        return "sage"
+    return "python"
+
+
+def geng_binary() -> str | None:
+    return shutil.which("geng") or shutil.which("nauty-geng")
+
+
+def geng_lines(binary: str, args: str) -> Iterator[bytes]:
+    """raw graph6 lines of one geng run"""
+
+    with subprocess.Popen([binary, "-q", *args.split()], stdout=subprocess.PIPE) as process:
+        yield from process.stdout
+    if process.returncode:
+        raise RuntimeError(f"geng {args} exited with status {process.returncode}")
+
+
+def augment_graph6(num_nodes: int, args: str = "") -> Iterator[str]:
+    """graph6 strings of every graph matching the geng options, by canonical augmentation
+
+    graphs grow one vertex at a time; a child is kept only if its new vertex is
+    in the orbit of the vertex the canonical labeling would remove (the last
+    minimum-degree vertex), so each class is reached from exactly one parent
+    class, and children of the same parent are deduplicated by certificate.
+    bipartite, triangle-free and maximum-degree constraints are hereditary and
+    prune parents; connectivity and minimum degree are checked on the result
+    """
+
+    if not isinstance(num_nodes, int) or num_nodes < 1:
+        raise ValueError("num_nodes must be a positive integer")
+    if num_nodes > MAX_PYTHON_NODES:
+        raise ValueError(f"the python backend supports at most {MAX_PYTHON_NODES} nodes; install geng")
+
+    options = _parse_geng_args(args)
+    index = 0
+    for adj in _augment([0], num_nodes, options):
+        if options["connected"] and not _is_connected(adj):
+            continue
+        if min(row.bit_count() for row in adj) < options["min_degree"]:
+            continue
+        if index % options["mod"] == options["res"]:
+            yield encode_graph6(adj, num_nodes)
+        index += 1
+
+
+def _augment(adj: list[int], num_nodes: int, options: dict) -> Iterator[list[int]]:
+    if len(adj) == num_nodes:
+        yield adj
+        return
+
+    new = len(adj)
+    seen = set()
+    for neighbours in range(1 << new):
+        child = [row | (neighbours >> u & 1) << new for u, row in enumerate(adj)] + [neighbours]
+        if not _admissible(child, options):
+            continue
+
+        search = _canonical_child(child)
+        if search is None or search.certificate in seen:
+            continue
+        seen.add(search.certificate)
+        yield from _augment(list(search.certificate), num_nodes, options)
+
+
+def _canonical_child(child: list[int]) -> CanonicalSearch | None:
+    """canonical search of `child` if its last vertex is the canonical one to remove"""
+
+    new = len(child) - 1
+    degrees = [row.bit_count() for row in child]
+    min_degree = min(degrees)
+    if degrees[new] != min_degree:
+        return None
+
+    search = CanonicalSearch.from_bitsets(child)
+    removable = [v for v in search.labeling if degrees[v] == min_degree][-1]
+    if removable != new and not any(new in orbit and removable in orbit for orbit in search.orbits()):
+        return None
+    return search
+
+
+def _admissible(child: list[int], options: dict) -> bool:
+    """whether the new (last) vertex keeps the hereditary constraints"""
+
+    new = len(child) - 1
+    neighbours = child[new]
+    if any(row.bit_count() > options["max_degree"] for row in child):
+        return False
+    if options["triangle_free"] and any(child[u] & neighbours for u in iter_bits(neighbours)):
+        return False
+    if options["bipartite"] and not _is_bipartite(child, new):
+        return False
+    return True
+
+
+def _is_bipartite(adj: list[int], start: int) -> bool:
+    """2-colour the component of `start`"""
+
+    colour = {start: 0}
+    frontier = [start]
+    while frontier:
+        next_frontier = []
+        for u in frontier:
+            for w in iter_bits(adj[u]):
+                if w not in colour:
+                    colour[w] = 1 - colour[u]
+                    next_frontier.append(w)
+                elif colour[w] == colour[u]:
+                    return False
+        frontier = next_frontier
+    return True
+
+
+def _is_connected(adj: list[int]) -> bool:
+    reached, frontier = 1, 1
+    while frontier:
+        grown = reached
+        for u in iter_bits(frontier):
+            grown |= adj[u]
+        frontier, reached = grown & ~reached, grown
+    return reached == (1 << len(adj)) - 1
+
+
+def _parse_geng_args(args: str) -> dict:
+    options = {
+        "connected": False, "bipartite": False, "triangle_free": False,
+        "min_degree": 0, "max_degree": MAX_PYTHON_NODES, "res": 0, "mod": 1,
+    }
+    for token in args.split():
+        if "/" in token:
+            res, mod = token.split("/")
+            options["res"], options["mod"] = int(res), int(mod)
+            continue
+        if not token.startswith("-"):
+            raise ValueError(f"unsupported geng argument {token!r} for the python backend")
+
+        flags = token[1:]
+        while flags:
+            flag, flags = flags[0], flags[1:]
+            if flag in "dD":
+                digits = len(flags) - len(flags.lstrip("0123456789"))
+                if not digits:
+                    raise ValueError(f"-{flag} needs a number")
+                options["min_degree" if flag == "d" else "max_degree"] = int(flags[:digits])
+                flags = flags[digits:]
+            elif flag == "c":
+                options["connected"] = True
+            elif flag == "b":
+                options["bipartite"] = True
+            elif flag == "t":
+                options["triangle_free"] = True
+            else:
+                raise ValueError(f"unsupported geng option -{flag} for the python backend")
+    return options
+
+
+def _has_sage() -> bool:
+    return importlib.util.find_spec("sage") is not None
@@ -0,0 +1,218 @@
+import numpy as np
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+
+HEADER = b">>graph6<<"
+MAX_NODES = 62  # single-byte graph6 order; also keeps bitset rows within uint64
+READ_BLOCK_SIZE = 1 << 20
+
+
+class Graph6Chunk(NamedTuple):
+    """same-order graphs decoded from a graph6 stream
+
+    `indices` are the positions of the graphs in the input (blank lines skipped),
+    so chunks of different orders can be put back into input order
+    """
+    num_nodes: int
+    indices: np.ndarray
+    bitsets: np.ndarray
+    num_edges: np.ndarray
+
+
+def iter_graph6_chunks(
+    source: str | Path | bytes | Iterable[str | bytes],
+    chunk_size: int = 4096
+    ) -> Iterator[Graph6Chunk]:
+    """stream graph6 graphs as bitset adjacency rows (bit j of row i <=> edge ij) without networkx
+
+    `source` is a path to a graph6 file, an in-memory byte buffer, or an iterable
+    of encodings (e.g. a `graph6_encoding` column); memory use is bounded by
+    `chunk_size`, not by the size of the input
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    offset = 0
+    for lines in _iter_line_batches(source, chunk_size):
+        yield from _decode_lines(lines, offset)
+        offset += len(lines)
+
+
+def iter_graph6_lines(
+    source: str | Path | bytes | Iterable[str | bytes],
+    chunk_size: int = 4096
+    ) -> Iterator[list[bytes]]:
+    """the raw graph6 lines `iter_graph6_chunks` decodes, in batches of at most `chunk_size`
+
+    headers and blank lines are dropped, so `Graph6Chunk.indices` of a batch
+    decoded on its own index straight into it
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+    yield from _iter_line_batches(source, chunk_size)
+
+
+def decode_graph6(encodings: Iterable[str | bytes]) -> tuple[np.ndarray, np.ndarray]:
+    """decode same-order encodings into (bitsets, num_edges) arrays in input order"""
+
+    chunks = list(iter_graph6_chunks(encodings, chunk_size=1 << 16))
+    if not chunks:
+        return np.zeros((0, 0), dtype=np.uint64), np.zeros(0, dtype=np.int64)
+
+    if len({chunk.num_nodes for chunk in chunks}) > 1:
+        raise ValueError("decode_graph6 expects graphs of the same order; use iter_graph6_chunks")
+
+    total = sum(len(chunk.indices) for chunk in chunks)
+    bitsets = np.empty((total, chunks[0].num_nodes), dtype=np.uint64)
+    num_edges = np.empty(total, dtype=np.int64)
+
+    for chunk in chunks:
+        bitsets[chunk.indices] = chunk.bitsets
+        num_edges[chunk.indices] = chunk.num_edges
+
+    return bitsets, num_edges
+
+
+def encode_graph6(rows: list[int], num_nodes: int) -> str:
+    """graph6 encoding of a graph given as integer bitset rows (bit j of row i <=> edge ij)"""
+
+    if num_nodes <= MAX_NODES:
+        out = [num_nodes + 63]
+    elif num_nodes <= 258047:
+        out = [126, (num_nodes >> 12 & 63) + 63, (num_nodes >> 6 & 63) + 63, (num_nodes & 63) + 63]
+    else:
+        raise ValueError("graph6 encoding supports at most 258047 nodes")
+
+    value, width = 0, 0
+    for j in range(1, num_nodes):
+        row = rows[j]
+        for i in range(j):
+            value = value << 1 | (row >> i & 1)
+            width += 1
+            if width == 6:
+                out.append(value + 63)
+                value, width = 0, 0
+    if width:
+        out.append((value << (6 - width)) + 63)
+
+    return bytes(out).decode()
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """positions of the set bits of an integer bitset row, lowest first"""
+
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _iter_line_batches(source, chunk_size: int) -> Iterator[list[bytes]]:
+    """split any supported source into batches of at most `chunk_size` non-blank lines"""
+
+    if isinstance(source, (str, Path)):
+        yield from _batch(_iter_file_lines(Path(source)), chunk_size)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield from _batch(bytes(source).splitlines(), chunk_size)
+    else:
+        yield from _batch(
+            (line.encode() if isinstance(line, str) else line for line in source),
+            chunk_size
+        )
+
+
+def _iter_file_lines(path: Path) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        tail = b""
+        while block := f.read(READ_BLOCK_SIZE):
+            lines = (tail + block).split(b"\n")
+            tail = lines.pop()
+            yield from lines
+        if tail:
+            yield tail
+
+
+def _batch(lines: Iterable[bytes], chunk_size: int) -> Iterator[list[bytes]]:
+    batch = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(HEADER):
+            line = line[len(HEADER):]
+        batch.append(line)
+        if len(batch) == chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _decode_lines(lines: list[bytes], offset: int) -> Iterator[Graph6Chunk]:
+    """decode a batch of graph6 lines, one chunk per distinct order"""
+
+    # the order byte and the length fix the layout, so every group can be decoded
+    # as one rectangular byte array (small orders share lengths, e.g. "A_" and "BW")
+    groups: dict[tuple[int, int], list[int]] = {}
+    for position, line in enumerate(lines):
+        groups.setdefault((line[0], len(line)), []).append(position)
+
+    for (_, length), positions in groups.items():
+        group = [lines[p] for p in positions]
+        raw = np.frombuffer(b"".join(group), dtype=np.uint8).reshape(len(group), length)
+
+        num_nodes = int(raw[0, 0]) - 63
+        if not 0 <= num_nodes <= MAX_NODES:
+            raise ValueError(f"unsupported graph6 line {group[0]!r} (only n <= {MAX_NODES} is supported)")
+        if (raw[:, 0] != raw[0, 0]).any() or length != 1 + _num_data_bytes(num_nodes):
+            raise ValueError(f"malformed graph6 line among {group[:3]!r}")
+
+        bitsets, num_edges = _decode_group(raw[:, 1:], num_nodes)
+        yield Graph6Chunk(num_nodes, np.asarray(positions) + offset, bitsets, num_edges)
+
+
+def _decode_group(data: np.ndarray, num_nodes: int) -> tuple[np.ndarray, np.ndarray]:
+    """turn (num_graphs, data_bytes) graph6 payloads into bitset rows and edge counts"""
+
+    num_graphs = data.shape[0]
+    num_pairs = num_nodes * (num_nodes - 1) // 2
+    if num_pairs == 0:
+        return np.zeros((num_graphs, num_nodes), dtype=np.uint64), np.zeros(num_graphs, dtype=np.int64)
+
+    if (data < 63).any() or (data > 126).any():
+        raise ValueError("graph6 payload bytes must lie in the range 63..126")
+
+    # each byte carries 6 bits, most significant first
+    bits = np.unpackbits((data - 63)[:, :, None], axis=2)[:, :, 2:]
+    bits = bits.reshape(num_graphs, -1)[:, :num_pairs]
+
+    weights = _pair_weights(num_nodes)
+    bitsets = bits.astype(np.uint64) @ weights
+    num_edges = bits.sum(axis=1, dtype=np.int64)
+
+    return bitsets, num_edges
+
+
+_PAIR_WEIGHTS: dict[int, np.ndarray] = {}
+
+
+def _pair_weights(num_nodes: int) -> np.ndarray:
+    """(num_pairs, n) matrix mapping the graph6 upper-triangle bit order onto bitset rows"""
+
+    if num_nodes not in _PAIR_WEIGHTS:
+        # graph6 lists x(i, j) for j = 1..n-1 and i = 0..j-1 (column-wise upper triangle)
+        pairs = [(i, j) for j in range(1, num_nodes) for i in range(j)]
+        weights = np.zeros((len(pairs), num_nodes), dtype=np.uint64)
+        for index, (i, j) in enumerate(pairs):
+            weights[index, i] = np.uint64(1) << np.uint64(j)
+            weights[index, j] = np.uint64(1) << np.uint64(i)
+        _PAIR_WEIGHTS[num_nodes] = weights
+
+    return _PAIR_WEIGHTS[num_nodes]
+
+
+def _num_data_bytes(num_nodes: int) -> int:
+    return -(-(num_nodes * (num_nodes - 1) // 2) // 6)
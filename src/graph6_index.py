@@ -0,0 +1,252 @@
+import os
+import mmap
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+from typing import Iterator
+
+from graph6 import HEADER, MAX_NODES, Graph6Chunk, iter_graph6_chunks
+
+
+INDEX_SUFFIX = ".idx.npy"
+SCAN_BLOCK_SIZE = 1 << 26  # bytes of the graph6 file examined per numpy pass
+
+# one record per graph: where its line starts, how long it is, and its order and size
+RECORD_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("num_nodes", "<u1"),
+    ("num_edges", "<u2"),
+])
+
+# set bits of every 6-bit graph6 payload value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(64)], dtype=np.uint8)
+
+
+class Graph6Index:
+    """byte offsets and (n, m) of every graph in a graph6 file, kept in a sidecar
+
+    the sidecar (`<file>.g6.idx.npy`) is a structured array of `RECORD_DTYPE`
+    built in one pass over the memory-mapped file and memory-mapped again on
+    `load`, so graph k is one slice of the mapped file, byte-balanced ranges can
+    be handed to worker processes, and graphs can be selected by order or edge
+    count without decoding. headers and blank lines get no record; trailing
+    carriage returns are not part of a line
+    """
+
+    def __init__(self, path: str | Path, records: np.ndarray):
+        self.path = Path(path)
+        self.records = records
+        self._file = None
+        self._map = None
+
+    def __repr__(self) -> str:
+        return f"Graph6Index(path={str(self.path)!r}, num_graphs={len(self)})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.line(index)
+
+    def __getstate__(self) -> dict:
+        # workers reopen the file (and map the sidecar) instead of receiving copies
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"], _load_records(index_path(state["path"])))
+
+    @classmethod
+    def build(cls, path: str | Path, block_size: int = SCAN_BLOCK_SIZE) -> "Graph6Index":
+        """scan `path` once and write its sidecar"""
+
+        path = Path(path)
+        records = _scan(path, block_size)
+
+        # a private temporary name, so concurrent builders never write into each other's file
+        sidecar = index_path(path)
+        with tempfile.NamedTemporaryFile(dir=sidecar.parent, prefix=sidecar.name, suffix=".part", delete=False) as f:
+            np.save(f, records)
+        Path(f.name).replace(sidecar)
+
+        return cls(path, _load_records(sidecar))
+
+    @classmethod
+    def load(cls, path: str | Path, rebuild: bool = False) -> "Graph6Index":
+        """memory-map the sidecar of `path`, (re)building it when missing or older than the file"""
+
+        path = Path(path)
+        sidecar = index_path(path)
+        if rebuild or not sidecar.exists() or sidecar.stat().st_mtime < path.stat().st_mtime:
+            return cls.build(path)
+        return cls(path, _load_records(sidecar))
+
+    @property
+    def num_nodes(self) -> np.ndarray:
+        return self.records["num_nodes"]
+
+    @property
+    def num_edges(self) -> np.ndarray:
+        return self.records["num_edges"]
+
+    def line(self, index: int) -> bytes:
+        """graph6 line of graph `index` (no newline, no header)"""
+
+        offset, length = int(self.records["offset"][index]), int(self.records["length"][index])
+        return self._mapped()[offset:offset + length]
+
+    def lines(self, start: int = 0, stop: int | None = None) -> list[bytes]:
+        """graph6 lines of graphs start..stop-1, read as one slice of the mapped file"""
+
+        records = self.records[start:stop]
+        if len(records) == 0:
+            return []
+
+        base = int(records["offset"][0])
+        end = int(records["offset"][-1]) + int(records["length"][-1])
+        block = self._mapped()[base:end]
+        offsets = (records["offset"] - base).tolist()
+        return [block[o:o + length] for o, length in zip(offsets, records["length"].tolist())]
+
+    def select(
+        self,
+        num_nodes: int | None = None,
+        num_edges: int | tuple[int, int] | None = None
+    ) -> np.ndarray:
+        """indices of the graphs with that order and edge count (a (low, high) range is inclusive)"""
+
+        mask = np.ones(len(self), dtype=bool)
+        if num_nodes is not None:
+            mask &= self.records["num_nodes"] == num_nodes
+        if isinstance(num_edges, tuple):
+            low, high = num_edges
+            mask &= (self.records["num_edges"] >= low) & (self.records["num_edges"] <= high)
+        elif num_edges is not None:
+            mask &= self.records["num_edges"] == num_edges
+        return np.flatnonzero(mask)
+
+    def partition(self, num_parts: int) -> list[tuple[int, int]]:
+        """split the graphs into at most `num_parts` contiguous (start, stop) ranges of similar byte size"""
+
+        if not isinstance(num_parts, int) or num_parts < 1:
+            raise ValueError("num_parts must be a positive integer")
+        if len(self) == 0:
+            return []
+
+        ends = self.records["offset"] + self.records["length"]
+        first, last = int(self.records["offset"][0]), int(ends[-1])
+        targets = first + (last - first) * np.arange(1, num_parts) / num_parts
+        cuts = np.unique(np.concatenate(([0], np.searchsorted(ends, targets, side="right"), [len(self)])))
+        return [(int(start), int(stop)) for start, stop in zip(cuts[:-1], cuts[1:]) if stop > start]
+
+    def iter_chunks(self, start: int = 0, stop: int | None = None, chunk_size: int = 4096) -> Iterator[Graph6Chunk]:
+        """decode graphs start..stop-1; chunk indices are positions in the whole file"""
+
+        stop = len(self) if stop is None else min(stop, len(self))
+        for block_start in range(start, stop, chunk_size):
+            lines = self.lines(block_start, min(block_start + chunk_size, stop))
+            for chunk in iter_graph6_chunks(lines, chunk_size=len(lines)):
+                yield chunk._replace(indices=chunk.indices + block_start)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def _mapped(self) -> mmap.mmap:
+        if self._map is None:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+
+def index_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _load_records(sidecar: Path) -> np.ndarray:
+    records = np.load(sidecar, mmap_mode="r")
+    if records.dtype != RECORD_DTYPE:
+        raise ValueError(f"{sidecar} is not a graph6 index")
+    return records
+
+
+def _scan(path: Path, block_size: int) -> np.ndarray:
+    """one pass over the memory-mapped file, `block_size` bytes at a time"""
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+
+    parts = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = np.frombuffer(mapped, dtype=np.uint8)
+        start = 0
+        while start < size:
+            stop = min(start + block_size, size)
+            if stop < size:
+                # end the block after its last newline (or the line running past it)
+                newline = mapped.rfind(b"\n", start, stop)
+                stop = newline + 1 if newline >= 0 else (mapped.find(b"\n", stop) + 1 or size)
+            parts.append(_scan_block(data[start:stop], start, skip_header=start == 0))
+            start = stop
+        del data
+
+    return np.concatenate(parts)
+
+
+def _scan_block(block: np.ndarray, base: int, skip_header: bool) -> np.ndarray:
+    """records of the whole lines in `block`, which starts at byte `base` of the file"""
+
+    newlines = np.flatnonzero(block == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(block)]))
+
+    if skip_header and bytes(block[:len(HEADER)]) == HEADER:
+        starts[0] += len(HEADER)
+    has_return = (ends > starts) & (block[np.maximum(ends - 1, 0)] == ord("\r"))
+    ends = ends - has_return
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+
+    records = np.zeros(len(starts), dtype=RECORD_DTYPE)
+    records["offset"] = starts + base
+    records["length"] = ends - starts
+
+    num_nodes = block[starts].astype(np.int64) - 63
+    if ((num_nodes < 0) | (num_nodes > MAX_NODES)).any():
+        bad = starts[np.flatnonzero((num_nodes < 0) | (num_nodes > MAX_NODES))[0]]
+        raise ValueError(f"unsupported graph6 line at byte {base + bad} (only n <= {MAX_NODES} is supported)")
+    records["num_nodes"] = num_nodes
+
+    # edge count = set payload bits; lines of one length are gathered as one 2-d array
+    lengths = ends - starts
+    for length in np.unique(lengths):
+        rows = np.flatnonzero(lengths == length)
+        payload = block[starts[rows, None] + np.arange(1, length)] - np.uint8(63)
+        if (payload > 63).any():
+            raise ValueError("graph6 payload bytes must lie in the range 63..126")
+        records["num_edges"][rows] = _POPCOUNT[payload].sum(axis=1, dtype=np.int64)
+
+    return records
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="build offset indices for graph6 files")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild indices that are up to date")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    for path in args.paths:
+        index = Graph6Index.load(path, rebuild=args.rebuild)
+        counts = np.bincount(index.num_nodes) if len(index) else []
+        print(index, {n: int(count) for n, count in enumerate(counts) if count})
@@ -0,0 +1,223 @@
+import heapq
+import networkx as nx
+from collections import deque
+
+
+class IncrementalGPN:
+    """stateful gpn evaluator that follows single edge insertions and removals
+
+    keeps per-source distance and shortest-path-count tables; an edge flip only
+    touches sources whose shortest-path DAG contains (or gains) that edge, and
+    inside such a source only the nodes below the edge are recomputed.
+    every change is logged so a rejected move can be undone with `rollback`
+    """
+
+    def __init__(
+        self,
+        G: nx.Graph,
+        count_trivial: bool = True
+    ):
+        self.nodes = list(G.nodes())
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.count_trivial = count_trivial
+
+        n = len(self.nodes)
+        self._unreachable = n  # larger than any finite distance
+        self.adj = [set() for _ in range(n)]
+        for u, v in G.edges():
+            self.adj[self.index[u]].add(self.index[v])
+            self.adj[self.index[v]].add(self.index[u])
+
+        self.dist = []
+        self.sigma = []
+        for source in range(n):
+            dist, sigma = self._bfs(source)
+            self.dist.append(dist)
+            self.sigma.append(sigma)
+
+        # sum of sigma over ordered pairs of distinct nodes (every unordered pair twice)
+        self._ordered_total = sum(sum(sigma) - 1 for sigma in self.sigma)
+        self._log = []
+
+    def __repr__(self) -> str:
+        return f"IncrementalGPN(num_nodes={len(self.nodes)}, value={self.value})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    @property
+    def value(self) -> int:
+        trivial = len(self.nodes) if self.count_trivial else 0
+        return trivial + self._ordered_total // 2
+
+    def has_edge(self, u, v) -> bool:
+        return self.index[v] in self.adj[self.index[u]]
+
+    def edge_set(self) -> set[frozenset]:
+        return {
+            frozenset((self.nodes[a], self.nodes[b]))
+            for a in range(len(self.nodes)) for b in self.adj[a] if a < b
+        }
+
+    def add_edge(self, u, v) -> int:
+        """insert edge uv and return the updated gpn"""
+
+        a, b = self.index[u], self.index[v]
+        if a == b or b in self.adj[a]:
+            raise ValueError(f"edge ({u}, {v}) cannot be added")
+
+        self.adj[a].add(b)
+        self.adj[b].add(a)
+        self._log.append(("add", a, b))
+
+        for source in range(len(self.nodes)):
+            dist = self.dist[source]
+            if dist[a] == dist[b]:
+                continue  # the new edge joins two nodes on the same layer
+            near, far = (a, b) if dist[a] < dist[b] else (b, a)
+            self._insert(source, near, far)
+
+        return self.value
+
+    def remove_edge(self, u, v) -> int:
+        """delete edge uv and return the updated gpn"""
+
+        a, b = self.index[u], self.index[v]
+        if b not in self.adj[a]:
+            raise ValueError(f"edge ({u}, {v}) is not in the graph")
+
+        self.adj[a].discard(b)
+        self.adj[b].discard(a)
+        self._log.append(("remove", a, b))
+
+        for source in range(len(self.nodes)):
+            dist = self.dist[source]
+            if abs(dist[a] - dist[b]) != 1:
+                continue  # the edge was not part of this source's shortest-path DAG
+            near, far = (a, b) if dist[a] < dist[b] else (b, a)
+            self._delete(source, far)
+
+        return self.value
+
+    def commit(self) -> None:
+        """accept every change since the last commit/rollback"""
+
+        self._log.clear()
+
+    def rollback(self) -> None:
+        """undo every change since the last commit/rollback"""
+
+        while self._log:
+            entry = self._log.pop()
+            if entry[0] == "add":
+                _, a, b = entry
+                self.adj[a].discard(b)
+                self.adj[b].discard(a)
+            elif entry[0] == "remove":
+                _, a, b = entry
+                self.adj[a].add(b)
+                self.adj[b].add(a)
+            else:
+                _, source, node, old_dist, old_sigma = entry
+                self._ordered_total += old_sigma - self.sigma[source][node]
+                self.dist[source][node] = old_dist
+                self.sigma[source][node] = old_sigma
+
+    def _bfs(self, source: int) -> tuple[list[int], list[int]]:
+        n = len(self.nodes)
+        dist = [self._unreachable] * n
+        sigma = [0] * n
+        dist[source], sigma[source] = 0, 1
+        queue = deque([source])
+
+        while queue:
+            current = queue.popleft()
+            for neighbor in self.adj[current]:
+                if dist[neighbor] == self._unreachable:
+                    dist[neighbor] = dist[current] + 1
+                    sigma[neighbor] = sigma[current]
+                    queue.append(neighbor)
+                elif dist[neighbor] == dist[current] + 1:
+                    sigma[neighbor] += sigma[current]
+
+        return dist, sigma
+
+    def _set(self, source: int, node: int, dist: int, sigma: int) -> None:
+        old_dist, old_sigma = self.dist[source][node], self.sigma[source][node]
+        if old_dist == dist and old_sigma == sigma:
+            return
+        self._log.append(("entry", source, node, old_dist, old_sigma))
+        self._ordered_total += sigma - old_sigma
+        self.dist[source][node] = dist
+        self.sigma[source][node] = sigma
+
+    def _descendants(self, source: int, root: int) -> list[int]:
+        """root and every node below it in the source's shortest-path DAG, in BFS order"""
+
+        dist = self.dist[source]
+        order, seen = [root], {root}
+        for current in order:
+            for neighbor in self.adj[current]:
+                if neighbor not in seen and dist[neighbor] == dist[current] + 1:
+                    seen.add(neighbor)
+                    order.append(neighbor)
+        return order
+
+    def _recount(self, source: int, order: list[int]) -> None:
+        """recompute path counts of `order` (sorted by distance) from their DAG parents"""
+
+        dist, sigma = self.dist[source], self.sigma[source]
+        for node in order:
+            if dist[node] == self._unreachable:
+                count = 0
+            else:
+                count = sum(sigma[p] for p in self.adj[node] if dist[p] == dist[node] - 1)
+            self._set(source, node, dist[node], count)
+
+    def _insert(self, source: int, near: int, far: int) -> None:
+        dist = self.dist[source]
+
+        # distances can only shrink, and only for nodes reached through `far`
+        if dist[near] + 1 < dist[far]:
+            self._set(source, far, dist[near] + 1, self.sigma[source][far])
+            queue = deque([far])
+            while queue:
+                current = queue.popleft()
+                for neighbor in self.adj[current]:
+                    if dist[neighbor] > dist[current] + 1:
+                        self._set(source, neighbor, dist[current] + 1, self.sigma[source][neighbor])
+                        queue.append(neighbor)
+
+        self._recount(source, self._descendants(source, far))
+
+    def _delete(self, source: int, far: int) -> None:
+        dist = self.dist[source]
+        region = self._descendants(source, far)
+
+        # `far` keeps another parent: every distance survives, only counts drop
+        if any(dist[p] == dist[far] - 1 for p in self.adj[far]):
+            self._recount(source, region)
+            return
+
+        # otherwise re-derive distances inside the region from its boundary
+        inside = set(region)
+        for node in region:
+            self._set(source, node, self._unreachable, 0)
+
+        heap = []
+        for node in region:
+            outside = [dist[p] for p in self.adj[node] if p not in inside]
+            if outside and min(outside) + 1 < self._unreachable:
+                heapq.heappush(heap, (min(outside) + 1, node))
+
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d >= dist[node]:
+                continue
+            self._set(source, node, d, 0)
+            for neighbor in self.adj[node]:
+                if neighbor in inside and d + 1 < dist[neighbor]:
+                    heapq.heappush(heap, (d + 1, neighbor))
+
+        region.sort(key=lambda node: dist[node])
+        self._recount(source, region)
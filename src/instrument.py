@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import runpy
+import atexit
+import pstats
+import cProfile
+import argparse
+import contextlib
+
+
+# checked by the hot paths before doing any bookkeeping; flip with enable()/disable()
+enabled = False
+
+_counters: dict[str, int] = {}
+_timers: dict[str, list] = {}  # name -> [calls, seconds]
+_sink = None
+
+
+def enable(path: str | None = None) -> None:
+    """start collecting; events are appended to `path` as JSON lines when given"""
+
+    global enabled, _sink
+    if path is not None and _sink is None:
+        # line buffered and append-only, so forked pool workers can share the file
+        _sink = open(path, "a", buffering=1, encoding="utf-8")
+    enabled = True
+
+
+def disable() -> None:
+    global enabled, _sink
+    enabled = False
+    if _sink is not None:
+        _sink.close()
+        _sink = None
+
+
+def reset() -> None:
+    _counters.clear()
+    _timers.clear()
+
+
+def count(name: str, value: int = 1) -> None:
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def add_time(name: str, seconds: float, calls: int = 1) -> None:
+    entry = _timers.get(name)
+    if entry is None:
+        _timers[name] = [calls, seconds]
+    else:
+        entry[0] += calls
+        entry[1] += seconds
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def timer(name: str):
+    """context manager adding the elapsed time to `name`; free when disabled"""
+
+    return _Timer(name) if enabled else _NULL_TIMER
+
+
+def event(kind: str, **fields) -> None:
+    """write one structured record to the JSON lines sink (if any)"""
+
+    if _sink is not None:
+        _sink.write(json.dumps({"event": kind, "time": time.time(), "pid": os.getpid(), **fields}) + "\n")
+
+
+def snapshot() -> dict:
+    return {
+        "counters": dict(_counters),
+        "timers": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in _timers.items()},
+    }
+
+
+def summary() -> str:
+    """plain-text table of every timer and counter, plus per-move rates of the annealer"""
+
+    lines = [f"{'timer':40s} {'calls':>10s} {'total s':>10s} {'mean us':>10s}"]
+    for name, (calls, seconds) in sorted(_timers.items()):
+        lines.append(f"{name:40s} {calls:10d} {seconds:10.3f} {1e6 * seconds / max(calls, 1):10.1f}")
+
+    lines.append("")
+    lines.append(f"{'counter':40s} {'value':>10s}")
+    for name, value in sorted(_counters.items()):
+        lines.append(f"{name:40s} {value:10d}")
+
+    move_types = sorted({
+        name.split(".")[1] for name in _counters if name.startswith("anneal.") and name.endswith(".attempts")
+    })
+    if move_types:
+        lines.append("")
+        lines.append(f"{'move':10s} {'attempts':>10s} {'invalid':>9s} {'accepted':>9s} {'rejected':>9s}")
+        for move_type in move_types:
+            stats = {key: _counters.get(f"anneal.{move_type}.{key}", 0)
+                     for key in ("attempts", "invalid", "accepted", "rejected")}
+            applied = max(stats["accepted"] + stats["rejected"], 1)
+            lines.append(
+                f"{move_type:10s} {stats['attempts']:10d} "
+                f"{stats['invalid'] / max(stats['attempts'], 1):9.1%} "
+                f"{stats['accepted'] / applied:9.1%} {stats['rejected'] / applied:9.1%}"
+            )
+
+    return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profile(path: str | None = None, perf: bool = False, limit: int = 30):
+    """cProfile one block (stats written to `path`, or the top `limit` functions printed)
+
+    `perf=True` additionally turns on CPython's perf trampoline (3.12+) so
+    `perf record` sees Python function names
+    """
+
+    if perf:
+        if hasattr(sys, "activate_stack_trampoline"):
+            sys.activate_stack_trampoline("perf")
+        else:
+            print("perf trampoline needs Python 3.12+; profiling with cProfile only", file=sys.stderr)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if perf and hasattr(sys, "deactivate_stack_trampoline"):
+            sys.deactivate_stack_trampoline()
+        if path is not None:
+            profiler.dump_stats(path)
+        else:
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(limit)
+
+
+# GPN_INSTRUMENT=1 turns collection on for a whole run; any other value is a JSON lines path
+if os.environ.get("GPN_INSTRUMENT"):
+    _target = os.environ["GPN_INSTRUMENT"]
+    enable(None if _target == "1" else _target)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="run a script with gpn instrumentation enabled")
+    parser.add_argument("--jsonl", help="append structured events to this file")
+    parser.add_argument("--profile", help="also cProfile the run and write the stats here")
+    parser.add_argument("--perf", action="store_true", help="enable the perf trampoline (Python 3.12+)")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+
+    # the script imports this module by name, so share state with that copy
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    import instrument
+
+    instrument.enable(args.jsonl)
+
+    @atexit.register
+    def _report() -> None:
+        instrument.event("summary", **instrument.snapshot())
+        print(instrument.summary(), file=sys.stderr)
+
+    sys.argv = [args.script, *args.args]
+    if args.profile or args.perf:
+        with instrument.profile(args.profile, perf=args.perf):
+            runpy.run_path(args.script, run_name="__main__")
+    else:
+        runpy.run_path(args.script, run_name="__main__")
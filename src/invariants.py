@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Iterable
+
+from graph6 import iter_graph6_chunks, iter_graph6_lines
+from utils import unpack_bitsets
+
+
+# column -> dtype of the table returned by `graph_invariants`
+COLUMNS = {
+    "graph6": "string",
+    "num_nodes": "int16",
+    "num_edges": "int32",
+    "gpn": "int64",
+    "is_connected": "bool",
+    "is_bipartite": "bool",
+    "is_regular": "bool",
+    "is_cubic": "bool",
+    "triangle_free": "bool",
+    "min_degree": "int16",
+    "max_degree": "int16",
+    "degree_sequence": "string",
+    "diameter": "int16",
+    "bipartition": "uint64",
+}
+
+
+def graph_invariants(
+    encodings: str | Path | bytes | Iterable[str | bytes],
+    count_trivial: bool = True,
+    chunk_size: int = 4096
+) -> pd.DataFrame:
+    """decode every graph once and compute gpn together with its structural invariants
+
+    one batched BFS from every source yields the path counts (gpn), the
+    distance layers (diameter, connectivity) and the layer parities
+    (bipartiteness and the bipartition); triangles come from the second BFS
+    step (A @ A). rows follow the input order; `diameter` is -1 for
+    disconnected graphs, `bipartition` is the bitmask of the colour class
+    holding the lowest node of each component (0 when not bipartite) and
+    `degree_sequence` lists the degrees in non-increasing order
+    """
+
+    parts, offset = [], 0
+    for lines in iter_graph6_lines(encodings, chunk_size):
+        for chunk in iter_graph6_chunks(lines, chunk_size=len(lines)):
+            parts.append(_chunk_table(chunk, lines, offset, count_trivial))
+        offset += len(lines)
+
+    if not parts:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in COLUMNS.items()})
+
+    table = pd.concat(parts, ignore_index=True).sort_values("position", kind="stable")
+    return table.drop(columns="position").reset_index(drop=True).astype(COLUMNS)
+
+
+def _chunk_table(chunk, lines: list[bytes], offset: int, count_trivial: bool) -> pd.DataFrame:
+    adjacency = unpack_bitsets(chunk.bitsets, chunk.num_nodes)
+    values = _invariant_layers(adjacency)
+    if count_trivial:
+        values["gpn"] += chunk.num_nodes
+
+    degrees = adjacency.sum(axis=2, dtype=np.int64)
+    min_degree = degrees.min(axis=1, initial=chunk.num_nodes)
+    max_degree = degrees.max(axis=1, initial=0)
+
+    return pd.DataFrame({
+        "position": chunk.indices + offset,
+        "graph6": [lines[i].decode() for i in chunk.indices],
+        "num_nodes": chunk.num_nodes,
+        "num_edges": chunk.num_edges,
+        "gpn": values["gpn"],
+        "is_connected": values["connected"],
+        "is_bipartite": values["bipartite"],
+        "is_regular": min_degree == max_degree,
+        "is_cubic": (min_degree == 3) & (max_degree == 3),
+        "triangle_free": values["triangles"] == 0,
+        "min_degree": min_degree,
+        "max_degree": max_degree,
+        "degree_sequence": [",".join(map(str, row)) for row in -np.sort(-degrees, axis=1)],
+        "diameter": values["diameter"],
+        "bipartition": np.where(values["bipartite"], values["colour_mask"], 0).astype(np.uint64),
+    })
+
+
+def _invariant_layers(adjacency: np.ndarray) -> dict[str, np.ndarray]:
+    """`utils._gpn_layers` extended with distances, layer parities and the triangle count"""
+
+    num_graphs, n = adjacency.shape[0], adjacency.shape[1]
+    if n == 0:
+        zeros = np.zeros(num_graphs, dtype=np.int64)
+        return {
+            "gpn": zeros, "connected": np.ones(num_graphs, dtype=bool), "bipartite": np.ones(num_graphs, dtype=bool),
+            "triangles": zeros, "diameter": zeros, "colour_mask": zeros.astype(np.uint64),
+        }
+
+    # exact in float64 for n <= 64, see `_gpn_layers`
+    adjacency = (adjacency != 0).astype(np.float64)
+
+    frontier = np.broadcast_to(np.eye(n), (num_graphs, n, n)).copy()
+    visited = frontier.astype(bool)
+    parity = np.zeros((num_graphs, n, n), dtype=bool)  # parity[b, s, t] = dist(s, t) is odd
+    total = np.zeros(num_graphs, dtype=np.float64)
+    eccentricity = np.zeros(num_graphs, dtype=np.int64)
+    triangles = None
+
+    level = 0
+    while True:
+        frontier = np.matmul(frontier, adjacency)
+        level += 1
+        if level == 2:
+            # the unmasked second step is A @ A; every triangle closes six of its walks
+            triangles = (frontier * adjacency).sum(axis=(1, 2)) / 6
+        frontier[visited] = 0.0
+
+        reached = frontier > 0
+        if not reached.any():
+            break
+
+        visited |= reached
+        if level % 2:
+            parity |= reached
+        total += frontier.sum(axis=(1, 2))
+        eccentricity[reached.any(axis=(1, 2))] = level
+
+    if triangles is None:
+        triangles = np.zeros(num_graphs)
+
+    # an edge inside one parity class of some source means an odd cycle
+    odd = parity.astype(np.float64)
+    odd_neighbours = np.matmul(odd, adjacency)
+    even_neighbours = adjacency.sum(axis=1)[:, None, :] - odd_neighbours
+    same_parity = np.where(parity, odd_neighbours, even_neighbours) * visited
+    bipartite = ~(same_parity > 0).any(axis=(1, 2))
+
+    # colour every node by its parity as seen from the lowest node of its component
+    root = visited.argmax(axis=1)
+    colour = np.take_along_axis(parity, root[:, None, :], axis=1)[:, 0, :]
+    colour_mask = (colour.astype(np.uint64) << np.arange(n, dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+    # the root's class is the even one; report that class
+    colour_mask = colour_mask ^ np.uint64((1 << n) - 1)
+
+    connected = visited.all(axis=(1, 2))
+    return {
+        "gpn": (total // 2).astype(np.int64),
+        "connected": connected,
+        "bipartite": bipartite,
+        "triangles": triangles.astype(np.int64),
+        "diameter": np.where(connected, eccentricity, -1),
+        "colour_mask": colour_mask,
+    }
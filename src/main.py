@@ -0,0 +1,347 @@
+import sys
+import json
+import heapq
+import logging
+import zipfile
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from itertools import islice
+from typing import IO, Callable, Iterator
+
+from graph6 import HEADER, iter_graph6_chunks
+from utils import gpn_batch
+
+
+DEFAULT_TOP_K = 10
+CSV_CHUNK_SIZE = 1 << 18
+G6_CHUNK_SIZE = 1 << 14
+
+# candidate column names of the project's result tables, in order of preference
+ENCODING_COLUMNS = ("graph6_encoding", "graph6_label", "id", "graph6")
+GPN_COLUMNS = ("gpn_num", "gpn_score", "gpn")
+
+
+class GPNSummary:
+    """mergeable per-(num_nodes, num_edges) aggregate of gpn values
+
+    every group keeps its count, sum, min/max with the first graph reaching
+    them, an exact histogram of gpn values and the `top_k` largest graphs;
+    memory depends on the number of groups and distinct values, not on the
+    number of rows. `sources` records the inputs already folded in, so the
+    same file is never counted twice when a saved summary is updated
+    """
+
+    def __init__(self, top_k: int = DEFAULT_TOP_K):
+        if not isinstance(top_k, int) or top_k < 0:
+            raise ValueError("top_k must be a non-negative integer")
+        self.top_k = top_k
+        self.groups: dict[tuple[int, int], dict] = {}
+        self.sources: dict[str, dict] = {}
+
+    def __repr__(self) -> str:
+        return f"GPNSummary(groups={len(self.groups)}, rows={self.num_rows}, sources={len(self.sources)})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    @property
+    def num_rows(self) -> int:
+        return sum(group["count"] for group in self.groups.values())
+
+    def update(
+        self,
+        num_nodes: np.ndarray,
+        num_edges: np.ndarray,
+        values: np.ndarray,
+        encodings: list[str] | None = None
+    ) -> None:
+        """fold one block of rows in; `encodings` (graph6) enables argmin/argmax and top-k"""
+
+        num_nodes = np.asarray(num_nodes, dtype=np.int64)
+        num_edges = np.asarray(num_edges, dtype=np.int64)
+        values = np.asarray(values, dtype=np.int64)
+        if not len(values):
+            return
+
+        keys, inverse = np.unique(np.stack([num_nodes, num_edges], axis=1), axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(keys) + 1))
+
+        for (n, m), start, stop in zip(keys.tolist(), bounds[:-1], bounds[1:]):
+            rows = order[start:stop]
+            block = values[rows]
+            low, high = rows[np.argmin(block)], rows[np.argmax(block)]
+            distinct, counts = np.unique(block, return_counts=True)
+
+            if encodings is not None and self.top_k:
+                best = rows[np.argsort(-block, kind="stable")[:self.top_k]]
+                top = [(int(values[i]), encodings[i]) for i in best]
+            else:
+                top = []
+
+            self._merge_group((n, m), {
+                "count": len(rows),
+                "total": int(block.sum()),
+                "min": int(values[low]),
+                "max": int(values[high]),
+                "argmin": encodings[low] if encodings is not None else None,
+                "argmax": encodings[high] if encodings is not None else None,
+                "histogram": dict(zip(distinct.tolist(), counts.tolist())),
+                "top": top,
+            })
+
+    def merge(self, other: "GPNSummary") -> "GPNSummary":
+        """fold another summary in (in place); returns self"""
+
+        overlap = self.sources.keys() & other.sources.keys()
+        if overlap:
+            raise ValueError(f"both summaries already contain {sorted(overlap)}")
+        for key, group in other.groups.items():
+            self._merge_group(key, group)
+        self.sources.update(other.sources)
+        return self
+
+    def add_source(self, path: str | Path, graph_class: str | None = None) -> bool:
+        """aggregate one input file (.g6, .csv or a .zip of those); False if it was already included"""
+
+        path = Path(path)
+        stat = path.stat()
+        name = str(path.resolve()) if graph_class is None else f"{path.resolve()}[{graph_class}]"
+        record = {"size": stat.st_size, "mtime": stat.st_mtime}
+
+        known = self.sources.get(name)
+        if known is not None:
+            if (known["size"], known["mtime"]) != (record["size"], record["mtime"]):
+                logging.warning(f"{path} changed since it was aggregated; rebuild the summary to include it again")
+            return False
+
+        rows_before = self.num_rows
+        for member, opener in _iter_inputs(path):
+            if member.endswith(".g6"):
+                self._add_graph6(opener)
+            elif member.endswith(".csv"):
+                self._add_csv(opener, graph_class)
+            else:
+                logging.info(f"skipping {member}")
+
+        record["rows"] = self.num_rows - rows_before
+        self.sources[name] = record
+        logging.info(f"{path}: {record['rows']} rows")
+        return True
+
+    def save(self, path: str | Path) -> None:
+        data = {
+            "top_k": self.top_k,
+            "sources": self.sources,
+            "groups": [
+                {
+                    "num_nodes": n,
+                    "num_edges": m,
+                    **{key: value for key, value in group.items() if key != "histogram"},
+                    "histogram": [[value, count] for value, count in sorted(group["histogram"].items())],
+                }
+                for (n, m), group in sorted(self.groups.items())
+            ],
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(path.suffix + ".part")
+        partial.write_text(json.dumps(data) + "\n")
+        partial.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "GPNSummary":
+        data = json.loads(Path(path).read_text())
+        summary = cls(data["top_k"])
+        summary.sources = data["sources"]
+        for group in data["groups"]:
+            key = (group.pop("num_nodes"), group.pop("num_edges"))
+            group["histogram"] = {value: count for value, count in group["histogram"]}
+            group["top"] = [tuple(entry) for entry in group["top"]]
+            summary.groups[key] = group
+        return summary
+
+    def tables(self) -> dict[str, pd.DataFrame]:
+        """report tables: per-group statistics, histograms and top-k graphs"""
+
+        keys = sorted(self.groups)
+        stats = pd.DataFrame([
+            {
+                "num_nodes": n,
+                "num_edges": m,
+                "count": group["count"],
+                "min_gpn": group["min"],
+                "max_gpn": group["max"],
+                "mean_gpn": group["total"] / group["count"],
+                "argmin": group["argmin"],
+                "argmax": group["argmax"],
+            }
+            for n, m in keys for group in [self.groups[(n, m)]]
+        ])
+        histogram = pd.DataFrame([
+            {"num_nodes": n, "num_edges": m, "gpn": value, "count": count}
+            for n, m in keys for value, count in sorted(self.groups[(n, m)]["histogram"].items())
+        ])
+        top = pd.DataFrame([
+            {"num_nodes": n, "num_edges": m, "rank": rank, "gpn": value, "graph6": encoding}
+            for n, m in keys
+            for rank, (value, encoding) in enumerate(self.groups[(n, m)]["top"], start=1)
+        ])
+        return {"stats": stats, "histogram": histogram, "top_k": top}
+
+    def _merge_group(self, key: tuple[int, int], incoming: dict) -> None:
+        group = self.groups.get(key)
+        if group is None:
+            self.groups[key] = {
+                **incoming,
+                "histogram": dict(incoming["histogram"]),
+                "top": sorted(incoming["top"], reverse=True)[:self.top_k],
+            }
+            return
+
+        group["count"] += incoming["count"]
+        group["total"] += incoming["total"]
+        # ties keep the graph seen first
+        if incoming["min"] < group["min"]:
+            group["min"], group["argmin"] = incoming["min"], incoming["argmin"]
+        if incoming["max"] > group["max"]:
+            group["max"], group["argmax"] = incoming["max"], incoming["argmax"]
+        histogram = group["histogram"]
+        for value, count in incoming["histogram"].items():
+            histogram[value] = histogram.get(value, 0) + count
+        group["top"] = heapq.nlargest(self.top_k, group["top"] + list(incoming["top"]))
+
+    def _add_graph6(self, opener: Callable[[], IO[bytes]]) -> None:
+        # gpn is computed here; lines are kept as read so top-k needs no re-encoding
+        with opener() as stream:
+            lines = (line.strip().removeprefix(HEADER) for line in stream)
+            for block in _chunked((line for line in lines if line), G6_CHUNK_SIZE):
+                for chunk in iter_graph6_chunks(block, chunk_size=len(block)):
+                    values = gpn_batch(chunk.bitsets)
+                    encodings = [block[i].decode() for i in chunk.indices] if self.top_k else None
+                    self.update(np.full(len(values), chunk.num_nodes), chunk.num_edges, values, encodings)
+
+    def _add_csv(self, opener: Callable[[], IO[bytes]], graph_class: str | None) -> None:
+        with opener() as stream:
+            header = pd.read_csv(stream, nrows=0).columns
+
+        encoding_column = next((c for c in ENCODING_COLUMNS if c in header), None)
+        gpn_column = next((c for c in GPN_COLUMNS if c in header), None)
+        if gpn_column is None:
+            raise ValueError(f"no gpn column among {list(header)}")
+        has_sizes = {"num_nodes", "num_edges"} <= set(header)
+        if encoding_column is None and not has_sizes:
+            raise ValueError("a csv needs a graph6 column or num_nodes and num_edges")
+        if graph_class is not None and "type" not in header:
+            raise ValueError("--graph-class needs a `type` column")
+
+        columns = [c for c in (encoding_column, gpn_column, "type") if c in header] + \
+            (["num_nodes", "num_edges"] if has_sizes else [])
+        with opener() as stream:
+            for frame in pd.read_csv(stream, usecols=columns, chunksize=CSV_CHUNK_SIZE):
+                self._add_frame(frame, encoding_column, gpn_column, has_sizes, graph_class)
+
+    def _add_frame(
+        self,
+        frame: pd.DataFrame,
+        encoding_column: str | None,
+        gpn_column: str,
+        has_sizes: bool,
+        graph_class: str | None
+    ) -> None:
+        if graph_class is not None:
+            frame = frame[frame["type"] == graph_class]
+        frame = frame.dropna(subset=[gpn_column])
+        if frame.empty:
+            return
+
+        values = frame[gpn_column].to_numpy(dtype=np.int64)
+        if encoding_column is None:
+            self.update(frame["num_nodes"].to_numpy(), frame["num_edges"].to_numpy(), values)
+            return
+
+        encodings = [
+            encoding.strip().removeprefix(HEADER.decode()) for encoding in frame[encoding_column].astype(str)
+        ]
+        if has_sizes:
+            self.update(frame["num_nodes"].to_numpy(), frame["num_edges"].to_numpy(), values, encodings)
+            return
+
+        # layouts without size columns are decoded for (num_nodes, num_edges)
+        for chunk in iter_graph6_chunks(encodings, chunk_size=len(encodings)):
+            positions = chunk.indices.tolist()
+            self.update(
+                np.full(len(positions), chunk.num_nodes), chunk.num_edges, values[positions],
+                [encodings[p] for p in positions]
+            )
+
+
+def _chunked(items: Iterator[bytes], size: int) -> Iterator[list[bytes]]:
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _iter_inputs(path: Path) -> Iterator[tuple[str, Callable[[], IO[bytes]]]]:
+    """(member name, opener of a binary stream) for a plain file or every member of a zip archive"""
+
+    if path.suffix != ".zip":
+        yield path.name, lambda: open(path, "rb")
+        return
+
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir():
+                yield info.filename, lambda info=info: archive.open(info)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="single-pass gpn aggregation over graph6 files and result tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    aggregate = commands.add_parser("aggregate", help="fold inputs (.g6, .csv, .zip) into a summary")
+    aggregate.add_argument("inputs", nargs="+")
+    aggregate.add_argument("--summary", required=True, help="summary json; updated in place if it exists")
+    aggregate.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="graphs kept per (n, m) for new summaries")
+    aggregate.add_argument("--graph-class", help="only rows of this `type` (class tables)")
+
+    merge = commands.add_parser("merge", help="combine summaries built from disjoint inputs")
+    merge.add_argument("summaries", nargs="+")
+    merge.add_argument("--output", required=True)
+
+    report = commands.add_parser("report", help="write the report tables of a summary as csv")
+    report.add_argument("summary")
+    report.add_argument("--output-dir", required=True)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = _parse_args()
+
+    if args.command == "aggregate":
+        path = Path(args.summary)
+        summary = GPNSummary.load(path) if path.exists() else GPNSummary(args.top_k)
+        for source in args.inputs:
+            summary.add_source(source, args.graph_class)
+            # checkpoint after every input, so an interrupted run keeps finished files
+            summary.save(path)
+        print(summary)
+
+    elif args.command == "merge":
+        summaries = [GPNSummary.load(path) for path in args.summaries]
+        if len({summary.top_k for summary in summaries}) > 1:
+            sys.exit("summaries must share the same top_k")
+        merged = summaries[0]
+        for summary in summaries[1:]:
+            merged.merge(summary)
+        merged.save(args.output)
+        print(merged)
+
+    else:
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name, table in GPNSummary.load(args.summary).tables().items():
+            table.to_csv(output_dir / f"{name}.csv", index=False)
+            print(output_dir / f"{name}.csv")
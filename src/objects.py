@@ -1,113 +1,169 @@
-from sage.all import *
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
 import random
-
-
-class BipartiteGraphs:
-    
-    def __init__(
-        self,
-        num_nodes: int
-    ):
+from abc import ABC, abstractmethod
+from pathlib import Path
+from functools import cached_property, lru_cache
+from typing import Iterator
+from graph6 import decode_graph6
+from generators import iter_graph6
+from collection import GraphCollection
+from render import EDGE_WIDTH, FONT_STYLE, NODE_STYLE, render_family
+
+
+class _GengFamily(ABC):
+    """lazy family of connected graphs enumerated with geng options
+
+    nothing is generated up front (not even a probe): iterating streams graphs
+    straight from the generator, while `graphs`, `len()`, indexing and the
+    derived properties materialize (and cache) their results only when first
+    requested. `backend` picks the generator (see `generators.iter_graph6`);
+    Sage is only imported when the "sage" backend is used. subclasses set
+    `GENG_ARGS` and `GRAPH_CLASS` and implement `_validate_args` and `figure_spec`
+    """
+
+    GENG_ARGS: str
+    GRAPH_CLASS: str
+
+    def __init__(self, num_nodes: int, backend: str = "auto"):
         self.num_nodes = num_nodes
-        self.graphs = self._build_graphs()
-    
+        self.backend = backend
+        self._validate_args(num_nodes)
+        self._num_graphs = None
+
     def __repr__(self) -> str:
-        return f"BipartiteGraphs(num_nodes={self.num_nodes}, num_graphs={len(self.graphs)})"
+        num_graphs = self._num_graphs if self._num_graphs is not None else "?"
+        return f"{type(self).__name__}(num_nodes={self.num_nodes}, num_graphs={num_graphs})"
 
     def __str__(self) -> str:
-        return f"{self.__repr__()}"
+        return self.__repr__()
+
+    def __iter__(self) -> Iterator[nx.Graph]:
+        if "graphs" in self.__dict__:
+            yield from self.graphs
+            return
+        for graph6 in self.iter_graph6():
+            yield nx.from_graph6_bytes(graph6.encode())
+
+    def __len__(self) -> int:
+        if self._num_graphs is None:
+            self._num_graphs = sum(1 for _ in self.iter_graph6())
+        return self._num_graphs
+
+    def __getitem__(self, index: int) -> nx.Graph:
+        return self.graphs[index]
 
     @staticmethod
+    @abstractmethod
     def _validate_args(num_nodes: int) -> None:
-        if not isinstance(num_nodes, int):
-            raise ValueError("num_nodes must be an integer")
-        if num_nodes < 1:
-            raise ValueError("bipartiteGraph graph must have at least 1 node")
+        ...
 
-    def _build_graphs(self):
-        self._validate_args(self.num_nodes)
+    def iter_graph6(self) -> Iterator[str]:
+        """stream graph6 encodings without building any graph objects"""
 
-        nx_graphs = [g.networkx_graph() for g in graphs.nauty_geng(f"{self.num_nodes} -b -c")]
+        yield from iter_graph6(self.num_nodes, self.GENG_ARGS, self.backend)
 
-        if not nx_graphs:
-            raise RuntimeError(f"no bipartite graphs generated for n={self.num_nodes}")
+    def iter_batches(self, batch_size: int = 4096) -> Iterator[tuple[list[str], np.ndarray]]:
+        """stream (encodings, bitset rows) batches that feed `utils.gpn_batch` directly"""
+
+        batch = []
+        for graph6 in self.iter_graph6():
+            batch.append(graph6)
+            if len(batch) == batch_size:
+                yield batch, decode_graph6(batch)[0]
+                batch = []
+        if batch:
+            yield batch, decode_graph6(batch)[0]
+
+    def to_collection(self) -> GraphCollection:
+        """every graph of the family as packed bitsets, without building networkx graphs"""
 
+        collection = GraphCollection.from_graph6(self.iter_graph6(), self.GRAPH_CLASS)
+        self._num_graphs = len(collection)
+        return collection
+
+    @cached_property
+    def graphs(self) -> list[nx.Graph]:
+        nx_graphs = list(self)
+        if not nx_graphs:
+            raise RuntimeError(f"no graphs generated for {type(self).__name__}(num_nodes={self.num_nodes})")
+        self._num_graphs = len(nx_graphs)
         return nx_graphs
 
-    @property
+    @cached_property
     def edges(self) -> list[list[tuple[int, int]]]:
-        return [list(graph.edges()) for graph in self.graphs]
+        return list(self.iter_edges())
 
-    @property
+    @cached_property
     def adj_matrices(self) -> list[np.ndarray]:
-        return [nx.to_numpy_array(graph, nodelist=sorted(graph.nodes())) for graph in self.graphs]
+        return list(self.iter_adj_matrices())
 
-    @property
+    @cached_property
     def incidence_matrices(self) -> list[np.ndarray]:
-        return [nx.incidence_matrix(graph, oriented=False).toarray() for graph in self.graphs]
+        return list(self.iter_incidence_matrices())
 
+    def iter_edges(self) -> Iterator[list[tuple[int, int]]]:
+        return (list(graph.edges()) for graph in self)
 
-    @property
-    def nodes(self) -> list[dict[str, list[str]]]:
-        node_sets = []
-        for graph in self.graphs:
-            u_set, v_set = nx.bipartite.sets(graph)
-            graph_dict = {
-                "U": sorted(list(u_set)),
-                "V": sorted(list(v_set))
-            }
-            node_sets.append(graph_dict)
-    
-        return node_sets
+    def iter_adj_matrices(self) -> Iterator[np.ndarray]:
+        return (nx.to_numpy_array(graph, nodelist=sorted(graph.nodes())) for graph in self)
 
-
-    @property
-    def degree_sequences(self) -> list[dict[str, tuple[int, ...]]]:
-        return [
-            {
-                "U": tuple(dict(graph.degree(u_set)).values()),
-                "V": tuple(dict(graph.degree(v_set)).values())
-            }
-            for graph in self.graphs
-            for u_set, v_set in [nx.bipartite.sets(graph)]
-        ]
+    def iter_incidence_matrices(self) -> Iterator[np.ndarray]:
+        return (nx.incidence_matrix(graph, oriented=False).toarray() for graph in self)
 
     def plot(self, index: int | None = None, filename: str | None = None) -> None:
         if index is not None:
-            self._plot_single(self.graphs[index], index, filename)
+            self._plot_single(self[index], index, filename)
         else:
-            for i, graph in enumerate(self.graphs):
+            for i, graph in enumerate(self):
                 self._plot_single(graph, i)
 
+    def render(
+        self,
+        output_dir: str | Path,
+        processes: int | None = None,
+        dpi: int = 100,
+        force: bool = False
+    ) -> list[Path]:
+        """write every graph's figure to `output_dir` on a process pool (headless Agg)
+
+        files whose graph and style are unchanged since the last render are
+        skipped; returns the paths that were written
+        """
+
+        jobs = [(i, graph6, self.figure_name(i, graph6)) for i, graph6 in enumerate(self.iter_graph6())]
+        return render_family(type(self), self.num_nodes, jobs, output_dir, processes, dpi, force)
+
+    def figure_name(self, index: int, graph6: str) -> str:
+        return f"{self.GRAPH_CLASS}_{self.num_nodes}_nodes_{index}.png"
+
+    @classmethod
+    @abstractmethod
+    def figure_spec(cls, graph: nx.Graph, index: int, num_nodes: int) -> dict:
+        """figure size, layout, labels, colour and title of one plot
+
+        `layout_key` identifies the node placement (layouts are cached per key),
+        so consecutive figures with the same key can share their node artists
+        """
 
     def _plot_single(self, graph: nx.Graph, index: int, filename: str | None = None):
-        plt.figure(figsize=(12, 8))
-        
-        u_set, v_set = nx.bipartite.sets(graph)
-        
-        labels = {}
-        for i, node in enumerate(sorted(u_set)):
-            labels[node] = f"$u_{{{i}}}$"
-        for i, node in enumerate(sorted(v_set)):
-            labels[node] = f"$v_{{{i}}}$"
-        
+        spec = self.figure_spec(graph, index, self.num_nodes)
+        plt.figure(figsize=spec["figsize"])
+
         nx.draw_networkx(
             graph,
-            pos=nx.bipartite_layout(graph, u_set),
-            labels=labels,
-            node_color = "#698ad1",
-            edgecolors="#292a40",
-            linewidths=2,
-            node_size=3000,
-            width=2,
-            font_color="white",
-            font_size=30
+            pos=spec["pos"],
+            labels=spec["labels"],
+            node_color=spec["node_color"],
+            width=EDGE_WIDTH,
+            **NODE_STYLE,
+            **FONT_STYLE
         )
-        
+
         plt.axis("off")
+        if spec["title"]:
+            plt.title(spec["title"])
 
         if filename:
             plt.savefig(filename, bbox_inches="tight", facecolor="white")
@@ -115,98 +171,106 @@ class BipartiteGraphs:
         else:
             plt.show()
 
-class CubicGraphs:
 
-    def __init__(self, num_nodes: int):
-        self.num_nodes = num_nodes
-        self.label = f"CubicGraphs({num_nodes})"
-        self.graphs = self._build_graphs()
-    
-    def __repr__(self) -> str:
-        return f"CubicGraphs(num_nodes={self.num_nodes}, num_graphs={len(self.graphs)})"
+class ConnectedGraphs(_GengFamily):
 
-    def __str__(self) -> str:
-        return self.__repr__()
+    GENG_ARGS = "-c"
+    GRAPH_CLASS = "connected"
 
     @staticmethod
     def _validate_args(num_nodes: int) -> None:
         if not isinstance(num_nodes, int):
             raise ValueError("num_nodes must be an integer")
-        if num_nodes < 4:
-            raise ValueError("cubic graph must have at least 4 nodes")
-        if num_nodes % 2 != 0:
-            raise ValueError("cubic (3-regular) graph must have an even number of nodes")
+        if num_nodes < 1:
+            raise ValueError("connected graph must have at least 1 node")
+
+    @classmethod
+    def figure_spec(cls, graph: nx.Graph, index: int, num_nodes: int) -> dict:
+        pos, labels = _circular_layout(num_nodes)
+        return {
+            "figsize": (10, 8), "pos": pos, "labels": labels, "layout_key": num_nodes,
+            "node_color": "#698ad1", "title": None,
+        }
 
-    def _build_graphs(self):
-        self._validate_args(self.num_nodes)
 
-        nx_graphs = [g.networkx_graph() for g in graphs.nauty_geng(f"{self.num_nodes} -d3 -D3 -c")]
+class BipartiteGraphs(_GengFamily):
 
-        # nx_graphs = [graph.networkx_graph() for graph in graphs(self.num_nodes)
-        #              if graph.is_regular(3) and graph.is_connected()]
+    GENG_ARGS = "-b -c"
+    GRAPH_CLASS = "bipartite"
 
-        if not nx_graphs:
-            raise RuntimeError
+    @staticmethod
+    def _validate_args(num_nodes: int) -> None:
+        if not isinstance(num_nodes, int):
+            raise ValueError("num_nodes must be an integer")
+        if num_nodes < 1:
+            raise ValueError("bipartiteGraph graph must have at least 1 node")
 
-        return nx_graphs
+    @cached_property
+    def nodes(self) -> list[dict[str, list[str]]]:
+        return list(self.iter_nodes())
 
-    @property
-    def edges(self) -> list[list[tuple[int, int]]]:
-        return [list(graph.edges()) for graph in self.graphs]
+    def iter_nodes(self) -> Iterator[dict[str, list[str]]]:
+        for graph in self:
+            u_set, v_set = nx.bipartite.sets(graph)
+            yield {
+                "U": sorted(list(u_set)),
+                "V": sorted(list(v_set))
+            }
 
-    @property
-    def adj_matrices(self) -> list[np.ndarray]:
-        return [nx.to_numpy_array(graph, nodelist=sorted(graph.nodes())) for graph in self.graphs]
+    @cached_property
+    def degree_sequences(self) -> list[dict[str, tuple[int, ...]]]:
+        return list(self.iter_degree_sequences())
 
-    @property
-    def incidence_matrices(self) -> list[np.ndarray]:
-        return [nx.incidence_matrix(graph, oriented=False).toarray() for graph in self.graphs]
+    def iter_degree_sequences(self) -> Iterator[dict[str, tuple[int, ...]]]:
+        for graph in self:
+            u_set, v_set = nx.bipartite.sets(graph)
+            yield {
+                "U": tuple(dict(graph.degree(u_set)).values()),
+                "V": tuple(dict(graph.degree(v_set)).values())
+            }
 
-    def plot(self, index: int | None = None, filename: str | None = None) -> None:
-        if index is not None:
-            self._plot_single(self.graphs[index], index, filename)
-        else:
-            for i, graph in enumerate(self.graphs):
-                self._plot_single(graph, i)
+    @classmethod
+    def figure_spec(cls, graph: nx.Graph, index: int, num_nodes: int) -> dict:
+        u_set, _ = nx.bipartite.sets(graph) if graph.number_of_nodes() > 1 else (set(graph), set())
+        layout_key = (num_nodes, tuple(sorted(u_set)))
+        pos, labels = _bipartite_layout(*layout_key)
+        return {
+            "figsize": (12, 8), "pos": pos, "labels": labels, "layout_key": layout_key,
+            "node_color": "#698ad1", "title": None,
+        }
 
-    def _plot_single(self, graph: nx.Graph, index: int, filename: str | None = None):
-        plt.figure(figsize=(10, 8))
-        
-        nx.draw_networkx(
-            graph,
-            pos=nx.circular_layout(graph),
-            labels={n: f"$v_{{{n+1}}}$" for n in graph.nodes()},
-            node_color="#698ad1",
-            edgecolors="#292a40",
-            linewidths=2,
-            node_size=3000,
-            width=2,
-            font_color="white",
-            font_size=30
-        )
 
-        plt.axis("off")
+class CubicGraphs(_GengFamily):
 
-        if filename:
-            plt.savefig(filename, bbox_inches="tight", facecolor="white")
-            plt.close()
-        else:
-            plt.show()
+    GENG_ARGS = "-d3 -D3 -c"
+    GRAPH_CLASS = "cubic"
 
+    @staticmethod
+    def _validate_args(num_nodes: int) -> None:
+        if not isinstance(num_nodes, int):
+            raise ValueError("num_nodes must be an integer")
+        if num_nodes < 4:
+            raise ValueError("cubic graph must have at least 4 nodes")
+        if num_nodes % 2 != 0:
+            raise ValueError("cubic (3-regular) graph must have an even number of nodes")
 
-class TriangleFreeGraphs:
-    NODE_COLOR = "#f08c4f"
+    @property
+    def label(self) -> str:
+        return f"CubicGraphs({self.num_nodes})"
+
+    @classmethod
+    def figure_spec(cls, graph: nx.Graph, index: int, num_nodes: int) -> dict:
+        pos, labels = _circular_layout(num_nodes)
+        return {
+            "figsize": (10, 8), "pos": pos, "labels": labels, "layout_key": num_nodes,
+            "node_color": "#698ad1", "title": None,
+        }
 
-    def __init__(self, num_nodes: int):
-        self.num_nodes = num_nodes
-        self.label = f"TriangleFreeGraphs({num_nodes})"
-        self.graphs = self._build_graphs()
-    
-    def __repr__(self) -> str:
-        return f"TriangleFreeGraphs(num_nodes={self.num_nodes}, num_graphs={len(self.graphs)})"
 
-    def __str__(self) -> str:
-        return self.__repr__()
+class TriangleFreeGraphs(_GengFamily):
+    NODE_COLOR = "#f08c4f"
+    GENG_ARGS = "-t -c"
+    GRAPH_CLASS = "triangle-free"
 
     @staticmethod
     def _validate_args(num_nodes: int) -> None:
@@ -215,67 +279,45 @@ class TriangleFreeGraphs:
         if num_nodes < 1:
             raise ValueError("triangle-free graph must have at least 1 node.")
 
-    def _build_graphs(self):
-        self._validate_args(self.num_nodes)
-
-        nx_graphs = [g.networkx_graph() for g in graphs.nauty_geng(f"{self.num_nodes} -t -c")]
-
-        if not nx_graphs:
-            raise RuntimeError(f"no triangle-free graphs generated for n={self.num_nodes}")
-
-        return nx_graphs
-
     @property
+    def label(self) -> str:
+        return f"TriangleFreeGraphs({self.num_nodes})"
+
+    @cached_property
     def degree_sequences(self) -> list[tuple[int, ...]]:
-        sequences = []
-        for graph in self.graphs:
-            deg_seq = tuple(d for n, d in sorted(graph.degree(), key=lambda x: x[0]))
-            sequences.append(deg_seq)
-        return sequences
+        return list(self.iter_degree_sequences())
+
+    def iter_degree_sequences(self) -> Iterator[tuple[int, ...]]:
+        for graph in self:
+            yield tuple(d for n, d in sorted(graph.degree(), key=lambda x: x[0]))
+
+    def figure_name(self, index: int, graph6: str) -> str:
+        degrees = [int(row).bit_count() for row in decode_graph6([graph6])[0][0]]
+        return f"tf_{'_'.join(map(str, degrees))}.png"
+
+    @classmethod
+    def figure_spec(cls, graph: nx.Graph, index: int, num_nodes: int) -> dict:
+        pos, labels = _circular_layout(num_nodes)
+        return {
+            "figsize": (10, 8), "pos": pos, "labels": labels, "layout_key": num_nodes,
+            "node_color": cls.NODE_COLOR, "title": f"TriangleFreeGraphs({num_nodes}) - Graph {index + 1}",
+        }
 
 
-    @property
-    def edges(self) -> list[list[tuple[int, int]]]:
-        return [list(graph.edges()) for graph in self.graphs]
+@lru_cache(maxsize=None)
+def _bipartite_layout(num_nodes: int, u_nodes: tuple[int, ...]) -> tuple[dict, dict]:
+    """positions and labels of a bipartite plot; depend only on the colour classes"""
 
-    @property
-    def adj_matrices(self) -> list[np.ndarray]:
-        return [nx.to_numpy_array(graph, nodelist=sorted(graph.nodes())) for graph in self.graphs]
+    graph = nx.empty_graph(num_nodes)
+    v_nodes = sorted(set(graph) - set(u_nodes))
+    labels = {node: f"$u_{{{i}}}$" for i, node in enumerate(u_nodes)}
+    labels.update({node: f"$v_{{{i}}}$" for i, node in enumerate(v_nodes)})
+    return nx.bipartite_layout(graph, u_nodes), labels
 
-    @property
-    def incidence_matrices(self) -> list[np.ndarray]:
-        return [nx.incidence_matrix(graph, oriented=False).toarray() for graph in self.graphs]
 
-    def plot(self, index: int | None = None, filename: str | None = None) -> None:
-        if index is not None:
-            self._plot_single(self.graphs[index], index, filename)
-        else:
-            for i, graph in enumerate(self.graphs):
-                self._plot_single(graph, i)
-
-    def _plot_single(self, graph: nx.Graph, index: int, filename: str | None = None):
-        plt.figure(figsize=(10, 8))
-        pos = nx.circular_layout(graph)
-        
-        nx.draw_networkx(
-            graph,
-            pos=pos,
-            labels={n: f"$v_{{{n+1}}}$" for n in graph.nodes()},
-            node_color=self.NODE_COLOR,
-            edgecolors="#292a40",
-            linewidths=2,
-            node_size=3000,
-            width=2,
-            font_color="white",
-            font_size=30
-        )
-        plt.axis("off")
-        plt.title(f"{self.label} - Graph {index+1}")
-        if filename:
-            plt.savefig(filename, bbox_inches="tight", facecolor="white")
-            plt.close()
-        else:
-            plt.show()
+@lru_cache(maxsize=None)
+def _circular_layout(num_nodes: int) -> tuple[dict, dict]:
+    return nx.circular_layout(nx.empty_graph(num_nodes)), {n: f"$v_{{{n+1}}}$" for n in range(num_nodes)}
 
 
 class StarGraph:
@@ -382,12 +424,16 @@ class RandomBalancedBipartiteGraph:
     def __str__(self) -> str:
         return f"{self.__repr__()}"
 
+    @classmethod
+    def _validate_args(cls, num_nodes: int, edge_probability: float) -> None:
+        cls._validate_num_nodes(num_nodes)
+        if not (0 <= edge_probability <= 1):
+            raise ValueError("edge_probability must be between 0 and 1")
+
     @staticmethod
-    def _validate_args(num_nodes: int, edge_probability: float) -> None:
+    def _validate_num_nodes(num_nodes: int) -> None:
         if not isinstance(num_nodes, int) or num_nodes < 2:
             raise ValueError("num_nodes must be an integer >= 2")
-        if not (0 <= edge_probability <= 1):
-            raise ValueError("edge_probability must be between 0 and 1")
     
     def _build_graph(self) -> nx.Graph:
         if self.seed is not None:
@@ -470,6 +516,54 @@ class RandomBalancedBipartiteGraph:
 
         return graph
 
+    @classmethod
+    def sample_biadjacency(
+        cls,
+        num_nodes: int,
+        edge_probability: float | np.ndarray = 0.5,
+        size: int = 1,
+        rng: np.random.Generator | int | None = None
+    ) -> np.ndarray:
+        """`size` connected balanced bipartite graphs as a (size, n // 2, n - n // 2) bool array
+
+        same construction as `_build_graph`: row i of the biadjacency is u node i,
+        column j is v node n // 2 + j; one random column is joined to every row,
+        every other column to one random row, and non-tree cells are kept with
+        `edge_probability` up to the same edge cap. `edge_probability` may hold
+        one value per sample. only `rng` is used; global RNG state is untouched
+        """
+
+        probabilities = np.broadcast_to(np.asarray(edge_probability, dtype=float), (size,))
+        cls._validate_num_nodes(num_nodes)
+        if ((probabilities < 0) | (probabilities > 1)).any():
+            raise ValueError("edge_probability must be between 0 and 1")
+
+        rng = np.random.default_rng(rng)
+        rows, cols = num_nodes // 2, num_nodes - num_nodes // 2
+        cells = rows * cols
+        samples = np.arange(size)
+
+        # spanning tree: a star from one column over all rows, other columns hang off random rows
+        tree = np.zeros((size, rows, cols), dtype=bool)
+        hub = rng.integers(cols, size=size)
+        tree[samples, :, hub] = True
+        attach = rng.integers(rows, size=(size, cols))
+        column = np.arange(cols)
+        tree[samples[:, None], attach, column] = True
+        tree = tree.reshape(size, cells)
+
+        # one uniform key per cell: key < p is the coin flip, key order the shuffle
+        keys = rng.random((size, cells))
+        keys[tree] = np.inf
+        ranks = np.empty((size, cells), dtype=np.int64)
+        np.put_along_axis(ranks, np.argsort(keys, axis=1), np.arange(cells), axis=1)
+
+        tree_edges = num_nodes - 1
+        limits = np.maximum(tree_edges, (probabilities * cells).astype(np.int64)) - tree_edges
+        limits = np.clip(limits, 0, cells - tree_edges)
+        extra = (keys < probabilities[:, None]) & (ranks < limits[:, None])
+
+        return (tree | extra).reshape(size, rows, cols)
 
     @property
     def edges(self) -> list:
@@ -0,0 +1,95 @@
+import heapq
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+from canonical import CanonicalSearch
+from objects import RandomBalancedBipartiteGraph
+from utils import biadjacency_bitsets, gpn_batch
+
+
+def random_search(
+    num_nodes: int,
+    num_samples: int = 100_000,
+    edge_probability: float | tuple[float, float] = (0.3, 0.9),
+    top_k: int = 10,
+    batch_size: int = 8192,
+    seed: int | None = None
+) -> list[tuple[int, str]]:
+    """best `top_k` of `num_samples` random connected balanced bipartite graphs
+
+    graphs are drawn with `RandomBalancedBipartiteGraph.sample_biadjacency`
+    and scored with `gpn_batch`, `batch_size` at a time; a (low, high) edge
+    probability is drawn uniformly per graph. returns (gpn, canonical graph6)
+    pairs, best first, with isomorphic graphs kept once; the run depends only
+    on `seed`
+    """
+
+    if not isinstance(top_k, int) or top_k < 1:
+        raise ValueError("top_k must be a positive integer")
+
+    rng = np.random.default_rng(seed)
+    top = []  # min-heap of (gpn, canonical graph6)
+    seen = set()
+
+    for start in range(0, num_samples, batch_size):
+        size = min(batch_size, num_samples - start)
+        if isinstance(edge_probability, tuple):
+            probabilities = rng.uniform(*edge_probability, size=size)
+        else:
+            probabilities = edge_probability
+
+        biadjacency = RandomBalancedBipartiteGraph.sample_biadjacency(num_nodes, probabilities, size, rng)
+        bitsets = biadjacency_bitsets(biadjacency)
+        values = gpn_batch(bitsets)
+
+        # best first, so the walk ends at the first graph that cannot enter a full heap;
+        # isomorphic copies are skipped without taking a slot
+        cutoff = top[0][0] if len(top) == top_k else -1
+        candidates = np.flatnonzero(values > cutoff)
+        for i in candidates[np.argsort(-values[candidates], kind="stable")]:
+            if len(top) == top_k and values[i] <= top[0][0]:
+                break
+            encoding = CanonicalSearch.from_bitsets([int(row) for row in bitsets[i]]).graph6()
+            if encoding in seen:
+                continue
+            entry = (int(values[i]), encoding)
+            if len(top) < top_k:
+                heapq.heappush(top, entry)
+            else:
+                seen.discard(heapq.heapreplace(top, entry)[1])
+            seen.add(encoding)
+
+        logging.info(f"n={num_nodes}: {start + size}/{num_samples} sampled, best gpn {max(top)[0]}")
+
+    return sorted(top, reverse=True)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="batched random search over balanced bipartite graphs")
+    parser.add_argument("num_nodes", type=int, nargs="+")
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--edge-probability", type=float, nargs=2, default=(0.3, 0.9),
+                        metavar=("LOW", "HIGH"), help="per-graph edge probability range")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=8192)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write the top graphs of every order to this csv")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = _parse_args()
+
+    data = []
+    for num_nodes in args.num_nodes:
+        for value, encoding in random_search(
+            num_nodes, args.samples, tuple(args.edge_probability), args.top_k, args.batch_size, args.seed
+        ):
+            data.append({"graph6_label": encoding, "num_nodes": num_nodes, "gpn_score": value})
+            print(num_nodes, value, encoding)
+
+    if args.output:
+        pd.DataFrame(data).to_csv(args.output, index=False)
@@ -0,0 +1,159 @@
+import os
+import argparse
+import json
+import hashlib
+import numpy as np
+import networkx as nx
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+MANIFEST = ".render-manifest.json"
+
+# bump when the drawing code changes so existing figures count as stale
+STYLE_VERSION = 2
+
+# keyword arguments shared by every family plot
+NODE_STYLE = {"edgecolors": "#292a40", "linewidths": 2, "node_size": 3000}
+EDGE_WIDTH = 2
+FONT_STYLE = {"font_color": "white", "font_size": 30}
+
+
+def render_family(
+    family_cls: type,
+    num_nodes: int,
+    jobs: list[tuple[int, str, str]],
+    output_dir: str | Path,
+    processes: int | None = None,
+    dpi: int = 100,
+    force: bool = False
+) -> list[Path]:
+    """render (index, graph6, file name) jobs of one family to PNG files in `output_dir`
+
+    figures are drawn on the Agg canvas (no pyplot, no display) by one reused
+    figure per worker process. a figure is skipped when its file exists and the
+    manifest in `output_dir` records the same graph, style and dpi for it.
+    returns the paths that were (re)written
+    """
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    # later jobs win when several graphs share a file name
+    latest = {name: (index, graph6) for index, graph6, name in jobs}
+    stamps = {name: _stamp(family_cls, graph6, index, dpi) for name, (index, graph6) in latest.items()}
+    pending = [
+        (index, graph6, name) for name, (index, graph6) in latest.items()
+        if force or manifest.get(name) != stamps[name] or not (output_dir / name).exists()
+    ]
+
+    if pending:
+        processes = processes or os.cpu_count() or 1
+        # contiguous runs, so consecutive graphs of one layout stay in one worker
+        size = -(-len(pending) // processes)
+        chunks = [pending[k:k + size] for k in range(0, len(pending), size)]
+        tasks = [(family_cls, num_nodes, chunk, str(output_dir), dpi) for chunk in chunks]
+        if len(tasks) == 1:
+            list(map(_render_chunk, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+                list(pool.map(_render_chunk, tasks))
+
+        manifest.update({name: stamps[name] for _, _, name in pending})
+        partial = manifest_path.with_suffix(".part")
+        partial.write_text(json.dumps(manifest, indent=0, sort_keys=True) + "\n")
+        partial.replace(manifest_path)
+
+    return [output_dir / name for _, _, name in pending]
+
+
+class _Renderer:
+    """one Agg figure reused across graphs; node artists survive while the layout is unchanged"""
+
+    def __init__(self, figsize: tuple[float, float], dpi: int):
+        self.figure = Figure(figsize=figsize, dpi=dpi, facecolor="white")
+        FigureCanvasAgg(self.figure)
+        # the default subplot of plt.figure(), so limits and crop match nx.draw_networkx
+        self.axes = self.figure.add_subplot()
+        self._node_key = None
+        self._node_limits = None
+        self._edges = None
+
+    def draw(self, graph: nx.Graph, spec: dict, path: Path) -> None:
+        pos = spec["pos"]
+        node_key = (spec["layout_key"], spec["node_color"])
+        if node_key != self._node_key:
+            self.axes.clear()
+            self.axes.set_axis_off()
+            nx.draw_networkx_nodes(graph, pos, ax=self.axes, node_color=spec["node_color"], **NODE_STYLE)
+            nx.draw_networkx_labels(graph, pos, ax=self.axes, labels=spec["labels"], **FONT_STYLE)
+            self._node_key, self._node_limits, self._edges = node_key, self.axes.dataLim.frozen(), None
+
+        if self._edges is not None:
+            self._edges.remove()
+            self._edges = None
+        self.axes.set_title(spec["title"] or "")
+        self.axes.dataLim.set(self._node_limits)
+        segments = np.array([(pos[u], pos[v]) for u, v in graph.edges()], dtype=float).reshape(-1, 2, 2)
+        if len(segments):
+            self._edges = LineCollection(segments, colors="k", linewidths=EDGE_WIDTH, zorder=1)
+            self.axes.add_collection(self._edges)
+            # the padded view nx.draw_networkx_edges adds after drawing
+            low, high = segments.reshape(-1, 2).min(axis=0), segments.reshape(-1, 2).max(axis=0)
+            pad = 0.05 * (high - low)
+            self.axes.update_datalim((low - pad, high + pad))
+        self.axes.autoscale_view()
+
+        self.figure.savefig(path, bbox_inches="tight", facecolor="white")
+
+
+def _render_chunk(task: tuple) -> int:
+    family_cls, num_nodes, chunk, output_dir, dpi = task
+    renderers = {}
+    for index, graph6, name in chunk:
+        graph = nx.from_graph6_bytes(graph6.encode())
+        spec = family_cls.figure_spec(graph, index, num_nodes)
+        renderer = renderers.get(spec["figsize"])
+        if renderer is None:
+            renderer = renderers[spec["figsize"]] = _Renderer(spec["figsize"], dpi)
+        renderer.draw(graph, spec, Path(output_dir) / name)
+    return len(chunk)
+
+
+def _stamp(family_cls: type, graph6: str, index: int, dpi: int) -> str:
+    key = f"{family_cls.__name__}|{STYLE_VERSION}|{dpi}|{index}|{graph6}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+# family, orders and sub-directory of every figure set under docs/figs
+DOCS_FIGURES = (
+    ("BipartiteGraphs", range(1, 9), "bipartite"),
+    ("CubicGraphs", range(4, 11, 2), "cubic"),
+    ("TriangleFreeGraphs", range(1, 8), "triangle-free"),
+)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="regenerate the graph figures under docs/figs")
+    parser.add_argument("--output-dir", default=str(Path(__file__).resolve().parents[1] / "docs" / "figs"))
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--force", action="store_true", help="re-render figures that are up to date")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import objects
+
+    args = _parse_args()
+    for family_name, orders, subdir in DOCS_FIGURES:
+        written = 0
+        for num_nodes in orders:
+            family = getattr(objects, family_name)(num_nodes)
+            written += len(family.render(Path(args.output_dir) / subdir, args.processes, args.dpi, args.force))
+        print(f"{subdir}: {written} figures written")
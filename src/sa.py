@@ -1,60 +1,696 @@
+import math
+import time
 import random
 import logging
 import networkx as nx
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from simanneal import Annealer
-from utils import gpn
+import instrument
+from utils import gpn, gpn_estimate
+from incremental import IncrementalGPN
 
 logging.basicConfig(level=logging.INFO)
 
 
+class _GraphMoves:
+    """index-addressed edge tables plus the undo and connectivity helpers shared by move sets"""
+
+    MOVE_TYPES = ()
+
+    def undo(self, move: tuple[tuple, tuple]) -> None:
+        added, removed = move
+        for edge in added:
+            self._remove(edge)
+        for edge in removed:
+            self._add(edge)
+
+    def _still_connected(self, a, b) -> bool:
+        """local reachability test after removing edge ab: bidirectional BFS that
+        grows the smaller frontier and stops as soon as the two searches meet"""
+
+        adj = self.graph.adj
+        seen_a, seen_b = {a}, {b}
+        frontier_a, frontier_b = [a], [b]
+
+        while frontier_a and frontier_b:
+            if len(frontier_a) > len(frontier_b):
+                frontier_a, frontier_b = frontier_b, frontier_a
+                seen_a, seen_b = seen_b, seen_a
+
+            next_frontier = []
+            for node in frontier_a:
+                for neighbor in adj[node]:
+                    if neighbor in seen_b:
+                        return True
+                    if neighbor not in seen_a:
+                        seen_a.add(neighbor)
+                        next_frontier.append(neighbor)
+            frontier_a = next_frontier
+
+        return False
+
+    @staticmethod
+    def _push(items: list, index: dict, item: tuple) -> None:
+        index[item] = len(items)
+        items.append(item)
+
+    @staticmethod
+    def _pop(items: list, index: dict, item: tuple) -> None:
+        # swap with the last element so removal stays O(1)
+        position = index.pop(item)
+        last = items.pop()
+        if position < len(items):
+            items[position] = last
+            index[last] = position
+
+
+class BipartiteMoves(_GraphMoves):
+    """in-place add/remove/swap moves on a connected bipartite graph
+
+    edges and non-edges of U x V are kept in index-addressed lists, so both can be
+    sampled and updated in O(1); every applied move is returned as an undo record
+    """
+
+    MOVE_TYPES = ("add", "remove", "swap")
+
+    def __init__(self, graph: nx.Graph, u_set: set, v_set: set, rng=random):
+        self.graph = graph
+        self.rng = rng
+        self.min_edges = graph.number_of_nodes() - 1
+
+        self.edges, self._edge_index = [], {}
+        self.non_edges, self._non_edge_index = [], {}
+        for u in u_set:
+            for v in v_set:
+                if graph.has_edge(u, v):
+                    self._push(self.edges, self._edge_index, (u, v))
+                else:
+                    self._push(self.non_edges, self._non_edge_index, (u, v))
+
+    def propose(self, move_type: str) -> tuple[tuple, tuple] | None:
+        """apply a random move in place; returns (added, removed) or None if it is not possible"""
+
+        if move_type == "add":
+            if not self.non_edges:
+                return None
+            edge = self.rng.choice(self.non_edges)
+            self._add(edge)
+            return (edge,), ()
+
+        if move_type == "remove":
+            if len(self.edges) <= self.min_edges:
+                return None
+            edge = self.rng.choice(self.edges)
+            self._remove(edge)
+            if not self._still_connected(*edge):
+                self._add(edge)
+                return None
+            return (), (edge,)
+
+        if move_type == "swap":
+            if not self.edges or not self.non_edges:
+                return None
+            old_edge = self.rng.choice(self.edges)
+            new_edge = self.rng.choice(self.non_edges)
+            self._add(new_edge)
+            self._remove(old_edge)
+            if not self._still_connected(*old_edge):
+                self._add(old_edge)
+                self._remove(new_edge)
+                return None
+            return (new_edge,), (old_edge,)
+
+        raise ValueError(f"move_type must be one of {self.MOVE_TYPES}")
+
+    def _add(self, edge: tuple) -> None:
+        self._pop(self.non_edges, self._non_edge_index, edge)
+        self._push(self.edges, self._edge_index, edge)
+        self.graph.add_edge(*edge)
+
+    def _remove(self, edge: tuple) -> None:
+        self._pop(self.edges, self._edge_index, edge)
+        self._push(self.non_edges, self._non_edge_index, edge)
+        self.graph.remove_edge(*edge)
+
+
+class RegularMoves(_GraphMoves):
+    """in-place double-edge switches on a connected graph: ab, cd -> ac, bd
+
+    a switch keeps every degree, so a d-regular graph stays d-regular; switches
+    that would create a loop, a multi-edge or disconnect the graph are refused
+    """
+
+    MOVE_TYPES = ("switch",)
+
+    def __init__(self, graph: nx.Graph, rng=random):
+        self.graph = graph
+        self.rng = rng
+        self.edges, self._edge_index = [], {}
+        for edge in graph.edges():
+            self._push(self.edges, self._edge_index, edge)
+
+    def propose(self, move_type: str) -> tuple[tuple, tuple] | None:
+        """apply a random switch in place; returns (added, removed) or None if it is not possible"""
+
+        if move_type != "switch":
+            raise ValueError(f"move_type must be one of {self.MOVE_TYPES}")
+        if len(self.edges) < 2:
+            return None
+
+        a, b = self.rng.choice(self.edges)
+        c, d = self.rng.choice(self.edges)
+        if self.rng.random() < 0.5:
+            c, d = d, c
+        if len({a, b, c, d}) < 4 or self.graph.has_edge(a, c) or self.graph.has_edge(b, d):
+            return None
+
+        move = ((a, c), (b, d)), ((a, b), (c, d))
+        for edge in move[0]:
+            self._add(edge)
+        for edge in move[1]:
+            self._remove(edge)
+        # a-c and b-d are edges now, so a reaching b connects all four ends
+        if not self._still_connected(a, b):
+            self.undo(move)
+            return None
+        return move
+
+    def _add(self, edge: tuple) -> None:
+        self._push(self.edges, self._edge_index, edge)
+        self.graph.add_edge(*edge)
+
+    def _remove(self, edge: tuple) -> None:
+        # edges are sampled in either orientation
+        self._pop(self.edges, self._edge_index, edge if edge in self._edge_index else edge[::-1])
+        self.graph.remove_edge(*edge)
+
+
 class GPNOptimizer(Annealer):
+    """simulated annealing of gpn over connected bipartite graphs with a fixed bipartition
 
-    def __init__(self, initial_graph: nx.Graph):
-        if not nx.is_bipartite(initial_graph):
-            raise ValueError("Initial graph must be bipartite")
+    with `surrogate=k` the chain is driven by `gpn_estimate` from k sampled
+    sources (redrawn every `surrogate_resample` steps) instead of exact gpn;
+    exact gpn is computed only for states that beat the best estimate so far,
+    so `best_energy` and `last_energy` stay exact.
+
+    energies of the last `memo_size` visited states are kept in an LRU keyed by
+    a Zobrist hash of the edge set (updated per edge flip), so revisits are
+    lookups; `memo_stats` holds the hit rate of the last `anneal`
+    """
+
+    # nx.Graph.copy(); only used for `best_state` snapshots inside `anneal`
+    copy_strategy = "method"
+    max_attempts = 50
+    trace_points = 100
+    # the Zobrist keys come from their own generator so that memoizing never changes a chain
+    zobrist_seed = 0x5EED
+
+    def __init__(
+        self,
+        initial_graph: nx.Graph,
+        incremental: bool = True,
+        seed: int | None = None,
+        surrogate: int | None = None,
+        surrogate_resample: int = 500,
+        memo_size: int | None = 1 << 16
+    ):
         if not nx.is_connected(initial_graph):
             raise ValueError("Initial graph must be connected")
+        self._check_family(initial_graph)
 
-        self.u_set, self.v_set = nx.bipartite.sets(initial_graph)
+        if surrogate is not None and not 0 < surrogate <= initial_graph.number_of_nodes():
+            raise ValueError("surrogate must be between 1 and the number of nodes")
+        if memo_size is not None and memo_size < 0:
+            raise ValueError("memo_size must be non-negative")
+
+        # sampled energies are not additive over edges, so they cannot be delta-updated
+        self.incremental = incremental and surrogate is None
+        self.surrogate = surrogate
+        self.surrogate_resample = surrogate_resample
+        # a seeded chain owns its generator; unseeded chains keep using the global one
+        self.rng = random.Random(seed) if seed is not None else random
+        self.trace = []
+        self.last_state = None
+        self._surrogate_sources = None
+        self.memo = OrderedDict() if memo_size else None
+        self.memo_size = memo_size
+        self.memo_stats = None
+        self._memo_hits, self._memo_misses = 0, 0
+        self._zobrist = _zobrist_table(initial_graph.nodes(), self.zobrist_seed)
         super().__init__(initial_graph)
+        if surrogate is not None:
+            self._resample_sources()
+
+        self._reset_tracking()
+
+    def _check_family(self, graph: nx.Graph) -> None:
+        if not nx.is_bipartite(graph):
+            raise ValueError("Initial graph must be bipartite")
+        self.u_set, self.v_set = nx.bipartite.sets(graph)
+
+    def _new_moves(self) -> _GraphMoves:
+        return BipartiteMoves(self.state, self.u_set, self.v_set, self.rng)
+
+    def _reset_tracking(self) -> None:
+        # move tables and the delta evaluator follow `self.state` edge by edge
+        self.moves = self._new_moves()
+        self.evaluator = IncrementalGPN(self.state) if self.incremental else None
+        self._tracked_state = self.state
+        self._last_move = None
+        self._last_move_type = None
+        # accepted moves whose energy came from the memo; the evaluator applies them lazily
+        self._lagging = []
+        self._hash = self._flip_key(self.state.edges())
+        self._current_energy = -float(self.evaluator.value) if self.evaluator is not None else self._full_energy(self.state)
+        self._remember(self._hash, self._current_energy)
 
     def energy(self) -> float:
-        return -gpn(self.state)
+        if self.state is self._tracked_state:
+            return self._current_energy if self._last_move is None else self._pending_energy
+        return self._full_energy(self.state)
 
     def move(self):
-        G = self.state
-        u_set, v_set = self.u_set, self.v_set
-
-        max_attempts = 50
-        for _ in range(max_attempts):
-            new_G = G.copy()
-            move_type = random.choice(["add", "remove", "swap"])
-
-            if move_type == "add":
-                u = random.choice(tuple(u_set))
-                v = random.choice(tuple(v_set))
-                if not new_G.has_edge(u, v):
-                    new_G.add_edge(u, v)
-
-            elif move_type == "remove":
-                if new_G.number_of_edges() > new_G.number_of_nodes() - 1:
-                    u, v = random.choice(list(new_G.edges()))
-                    new_G.remove_edge(u, v)
-
-            elif move_type == "swap":
-                existing = list(new_G.edges())
-                missing = [
-                    (u, v) for u in u_set for v in v_set
-                    if not new_G.has_edge(u, v)
-                ]
-                if existing and missing:
-                    u1, v1 = random.choice(existing)
-                    u2, v2 = random.choice(missing)
-                    new_G.remove_edge(u1, v1)
-                    new_G.add_edge(u2, v2)
-
-            if nx.is_bipartite(new_G) and nx.is_connected(new_G):
-                self.state = new_G
-                return
-
-        return
\ No newline at end of file
+        # simanneal's own loops (e.g. `auto`) restore rejected states by assigning
+        # a copy, so a foreign state object means the tracking must be rebuilt
+        if self.state is not self._tracked_state:
+            self._reset_tracking()
+        else:
+            self._commit()
+
+        return self._propose()
+
+    def anneal(self):
+        """simanneal's exponential-cooling Metropolis loop, except that moves are made
+        in place and rejected moves are undone instead of restoring a copied state"""
+
+        step = 0
+        self.start = time.time()
+
+        if self.Tmin <= 0.0:
+            raise ValueError("exponential cooling requires a minimum temperature greater than zero")
+        Tfactor = -math.log(self.Tmax / self.Tmin)
+
+        if self.state is not self._tracked_state:
+            self._reset_tracking()
+
+        T = self.Tmax
+        E = self.energy()
+        self.best_state = self.copy_state(self.state)
+        # in surrogate mode E is an estimate; best_energy is always exact
+        self.best_energy = E if self.surrogate is None else self._exact_energy(self.state)
+        best_estimate = E
+        trials, accepts, improves = 0, 0, 0
+        instrumented = instrument.enabled
+        counters_before = instrument.snapshot()["counters"] if instrumented else None
+        trace_wavelength = max(1, self.steps // self.trace_points)
+        self.trace = [(step, T, E, self.best_energy)]
+        self._memo_hits, self._memo_misses = 0, 0
+        if self.updates > 0:
+            update_wavelength = self.steps / self.updates
+            self.update(step, T, E, None, None)
+
+        while step < self.steps and not self.user_exit:
+            step += 1
+            T = self.Tmax * math.exp(Tfactor * step / self.steps)
+            dE = self._propose()
+            move_type = self._last_move_type
+            trials += 1
+
+            if dE > 0.0 and math.exp(-dE / T) < self.rng.random():
+                self._reject()
+                if instrumented and move_type is not None:
+                    instrument.count(f"anneal.{move_type}.rejected")
+            else:
+                self._commit()
+                if instrumented and move_type is not None:
+                    instrument.count(f"anneal.{move_type}.accepted")
+                E += dE
+                accepts += 1
+                if dE < 0.0:
+                    improves += 1
+                if self.surrogate is None:
+                    if E < self.best_energy:
+                        self.best_state = self.copy_state(self.state)
+                        self.best_energy = E
+                elif E < best_estimate:
+                    best_estimate = E
+                    exact = self._exact_energy(self.state)
+                    if exact < self.best_energy:
+                        self.best_state = self.copy_state(self.state)
+                        self.best_energy = exact
+
+            if self.surrogate is not None and step % self.surrogate_resample == 0:
+                # fresh sources so the chain does not overfit one sample
+                self._resample_sources()
+                E = self._current_energy = self._full_energy(self.state)
+                self._remember(self._hash, E)
+                best_estimate = self._full_energy(self.best_state)
+
+            if step % trace_wavelength == 0:
+                self.trace.append((step, T, E, self.best_energy))
+
+            if self.updates > 1:
+                if (step // update_wavelength) > ((step - 1) // update_wavelength):
+                    self.update(step, T, E, accepts / trials, improves / trials)
+                    trials, accepts, improves = 0, 0, 0
+
+        if self.memo is not None:
+            lookups = self._memo_hits + self._memo_misses
+            self.memo_stats = {
+                "hits": self._memo_hits,
+                "misses": self._memo_misses,
+                "hit_rate": self._memo_hits / lookups if lookups else 0.0,
+                "size": len(self.memo),
+            }
+
+        if instrumented:
+            self._record_run(step, time.time() - self.start, counters_before)
+
+        # the chain's current state (not its best) is what replica exchange continues from
+        self.last_state = self.state
+        self.last_energy = E if self.surrogate is None else self._exact_energy(self.state)
+        self.state = self.copy_state(self.best_state)
+        self._reset_tracking()
+        if self.save_state_on_exit:
+            self.save_state()
+
+        return self.best_state, self.best_energy
+
+    def _propose(self) -> float:
+        """apply one valid random move in place and return its energy change"""
+
+        self._last_move, self._last_move_type = None, None
+        for _ in range(self.max_attempts):
+            move_type = self.rng.choice(self.moves.MOVE_TYPES)
+            move = self.moves.propose(move_type)
+            if instrument.enabled:
+                instrument.count(f"anneal.{move_type}.attempts")
+                if move is None:
+                    instrument.count(f"anneal.{move_type}.invalid")
+            if move is not None:
+                self._last_move, self._last_move_type = move, move_type
+                break
+
+        if self._last_move is None:
+            return 0.0
+
+        added, removed = self._last_move
+        self._pending_hash = self._hash ^ self._flip_key(added) ^ self._flip_key(removed)
+        self._evaluated = False
+        with instrument.timer("anneal.energy"):
+            self._pending_energy = self._recall(self._pending_hash)
+            if self._pending_energy is None:
+                self._pending_energy = self._evaluate(added, removed)
+                self._evaluated = True
+                self._remember(self._pending_hash, self._pending_energy)
+
+        return float(self._pending_energy - self._current_energy)
+
+    def _evaluate(self, added: tuple, removed: tuple) -> float:
+        """energy of the state with the pending move applied"""
+
+        if self.evaluator is None:
+            return self._full_energy(self.state)
+
+        for move in self._lagging:
+            self._apply(*move)
+        if self._lagging:
+            self.evaluator.commit()
+            self._lagging = []
+
+        self._apply(added, removed)
+        return -self.evaluator.value
+
+    def _apply(self, added: tuple, removed: tuple) -> None:
+        # insert first so the evaluated graph never falls apart mid-move
+        for u, v in added:
+            self.evaluator.add_edge(u, v)
+        for u, v in removed:
+            self.evaluator.remove_edge(u, v)
+
+    def _flip_key(self, edges) -> int:
+        key = 0
+        for u, v in edges:
+            key ^= self._zobrist[u][v]
+        return key
+
+    def _recall(self, key: int) -> float | None:
+        if self.memo is None:
+            return None
+        energy = self.memo.get(key)
+        if energy is None:
+            self._memo_misses += 1
+        else:
+            self._memo_hits += 1
+            self.memo.move_to_end(key)
+        return energy
+
+    def _remember(self, key: int, energy: float) -> None:
+        if self.memo is None:
+            return
+        self.memo[key] = energy
+        self.memo.move_to_end(key)
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+
+    def _full_energy(self, state: nx.Graph) -> float:
+        if self.surrogate is None:
+            return self._exact_energy(state)
+        return -float(gpn_estimate(state, sources=self._surrogate_sources).value)
+
+    @staticmethod
+    def _exact_energy(state: nx.Graph) -> float:
+        # a float in every mode, like the surrogate estimates and the accumulated deltas
+        return -float(gpn(state))
+
+    def _resample_sources(self) -> None:
+        self._surrogate_sources = self.rng.sample(list(self.state.nodes()), self.surrogate)
+        # memoized estimates belong to the previous sources
+        if self.memo is not None:
+            self.memo.clear()
+
+    def _record_run(self, steps: int, seconds: float, counters_before: dict) -> None:
+        counters = instrument.snapshot()["counters"]
+        instrument.add_time("anneal", seconds)
+        instrument.count("anneal.steps", steps)
+        instrument.event(
+            "anneal",
+            steps=steps,
+            seconds=seconds,
+            steps_per_second=steps / seconds if seconds else None,
+            Tmax=self.Tmax,
+            Tmin=self.Tmin,
+            best_energy=self.best_energy,
+            incremental=self.incremental,
+            surrogate=self.surrogate,
+            memo=self.memo_stats,
+            moves={
+                move_type: {
+                    key: counters.get(f"anneal.{move_type}.{key}", 0)
+                    - counters_before.get(f"anneal.{move_type}.{key}", 0)
+                    for key in ("attempts", "invalid", "accepted", "rejected")
+                }
+                for move_type in self.moves.MOVE_TYPES
+            },
+        )
+
+    def _commit(self) -> None:
+        if self._last_move is not None:
+            if self.evaluator is not None:
+                if self._evaluated:
+                    self.evaluator.commit()
+                else:
+                    self._lagging.append(self._last_move)
+            self._current_energy = self._pending_energy
+            self._hash = self._pending_hash
+        self._last_move = None
+
+    def _reject(self) -> None:
+        if self._last_move is not None:
+            self.moves.undo(self._last_move)
+            if self.evaluator is not None and self._evaluated:
+                self.evaluator.rollback()
+        self._last_move = None
+
+
+class RegularGPNOptimizer(GPNOptimizer):
+    """`GPNOptimizer` over connected d-regular graphs, moving by double-edge switches
+
+    every state keeps the initial degree sequence; the schedule, surrogate mode,
+    incremental energy and seeding are those of `GPNOptimizer`
+    """
+
+    def _check_family(self, graph: nx.Graph) -> None:
+        if not nx.is_regular(graph):
+            raise ValueError("Initial graph must be regular")
+
+    def _new_moves(self) -> _GraphMoves:
+        return RegularMoves(self.state, self.rng)
+
+
+# family name -> optimizer class, as accepted by `parallel_anneal`
+OPTIMIZERS = {"bipartite": GPNOptimizer, "regular": RegularGPNOptimizer}
+
+
+def parallel_anneal(
+    initial_graph: nx.Graph,
+    num_chains: int = 4,
+    seeds: list[int] | None = None,
+    mode: str = "multistart",
+    steps: int = 5000,
+    Tmax: float = 5.0,
+    Tmin: float = 1e-3,
+    exchange_interval: int = 100,
+    processes: int | None = None,
+    family: str = "bipartite"
+) -> tuple[nx.Graph, float, list[dict]]:
+    """run several GPNOptimizer chains on a process pool
+
+    `mode="multistart"` anneals `num_chains` independent chains over the usual
+    Tmax -> Tmin schedule; `mode="tempering"` keeps one replica per temperature of a
+    geometric Tmax..Tmin ladder and proposes swaps between neighbouring temperatures
+    every `exchange_interval` steps. chain k is fully determined by `seeds[k]`
+    (default `k`); returns (best_state, best_energy, per-chain summaries with traces).
+    `family` picks the optimizer from `OPTIMIZERS` ("regular" for d-regular graphs)
+    """
+
+    if mode not in ("multistart", "tempering"):
+        raise ValueError("mode must be 'multistart' or 'tempering'")
+    if family not in OPTIMIZERS:
+        raise ValueError(f"family must be one of {tuple(OPTIMIZERS)}")
+    if not isinstance(num_chains, int) or num_chains < 1:
+        raise ValueError("num_chains must be a positive integer")
+    if seeds is None:
+        seeds = list(range(num_chains))
+    if len(seeds) != num_chains:
+        raise ValueError("seeds must hold one seed per chain")
+
+    nodes, edges = list(initial_graph.nodes()), list(initial_graph.edges())
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        if mode == "multistart":
+            jobs = [(nodes, edges, seed, Tmax, Tmin, steps, family) for seed in seeds]
+            results = list(pool.map(_run_chain, jobs))
+            chains = [
+                {
+                    "seed": seed, "best_energy": result["best_energy"],
+                    "memo_stats": result["memo_stats"], "trace": result["trace"],
+                }
+                for seed, result in zip(seeds, results)
+            ]
+            best = min(results, key=lambda result: result["best_energy"])
+            return _to_graph(nodes, best["best_edges"]), best["best_energy"], chains
+
+        return _parallel_tempering(
+            pool, nodes, edges, seeds, steps, Tmax, Tmin, exchange_interval, family
+        )
+
+
+def _parallel_tempering(pool, nodes, edges, seeds, steps, Tmax, Tmin, exchange_interval, family):
+    num_replicas = len(seeds)
+    if num_replicas == 1:
+        temperatures = [Tmin]
+    else:
+        temperatures = [
+            Tmax * (Tmin / Tmax) ** (k / (num_replicas - 1)) for k in range(num_replicas)
+        ]
+
+    # replica k starts at temperature k; replicas carry their own rng state across rounds
+    replicas = [
+        {"seed": seed, "edges": edges, "rng_state": random.Random(seed).getstate(), "trace": []}
+        for seed in seeds
+    ]
+    slot_of = list(range(num_replicas))  # slot_of[replica] = temperature index
+    exchange_rng = random.Random(seeds[0])
+    best_edges, best_energy = edges, math.inf
+    swaps_proposed, swaps_accepted = 0, 0
+
+    done = 0
+    while done < steps:
+        segment = min(exchange_interval, steps - done)
+        jobs = [
+            (nodes, replica["edges"], replica["rng_state"], temperatures[slot_of[k]],
+             temperatures[slot_of[k]], segment, family)
+            for k, replica in enumerate(replicas)
+        ]
+        for replica, result in zip(replicas, pool.map(_run_chain, jobs)):
+            replica["edges"] = result["last_edges"]
+            replica["energy"] = result["last_energy"]
+            replica["rng_state"] = result["rng_state"]
+            replica["trace"].extend(
+                (done + step, T, E, best) for step, T, E, best in result["trace"][1:]
+            )
+            if result["best_energy"] < best_energy:
+                best_edges, best_energy = result["best_edges"], result["best_energy"]
+        done += segment
+
+        # Metropolis swaps between neighbouring temperatures
+        replica_at = {slot: k for k, slot in enumerate(slot_of)}
+        for slot in range(exchange_rng.randrange(2), num_replicas - 1, 2):
+            i, j = replica_at[slot], replica_at[slot + 1]
+            delta = (replicas[i]["energy"] - replicas[j]["energy"]) * \
+                (1.0 / temperatures[slot] - 1.0 / temperatures[slot + 1])
+            swaps_proposed += 1
+            if delta >= 0.0 or exchange_rng.random() < math.exp(delta):
+                slot_of[i], slot_of[j] = slot + 1, slot
+                swaps_accepted += 1
+
+    chains = [
+        {
+            "seed": replica["seed"],
+            "best_energy": min((best for *_, best in replica["trace"]), default=math.inf),
+            "final_temperature": temperatures[slot_of[k]],
+            "trace": replica["trace"],
+        }
+        for k, replica in enumerate(replicas)
+    ]
+    logging.info(f"replica exchange: {swaps_accepted}/{swaps_proposed} swaps accepted")
+
+    return _to_graph(nodes, best_edges), best_energy, chains
+
+
+def _run_chain(job: tuple) -> dict:
+    """anneal one chain (or one tempering segment) in a worker process
+
+    the third job entry is either the chain seed or a saved rng state to resume from
+    """
+
+    nodes, edges, seed, Tmax, Tmin, steps, family = job
+    resume = not isinstance(seed, int)
+
+    opt = OPTIMIZERS[family](_to_graph(nodes, edges), seed=0 if resume else seed)
+    if resume:
+        opt.rng.setstate(seed)
+    opt.steps, opt.Tmax, opt.Tmin, opt.updates = steps, Tmax, Tmin, 0
+
+    best_state, best_energy = opt.anneal()
+
+    return {
+        "best_edges": list(best_state.edges()),
+        "best_energy": best_energy,
+        "last_edges": list(opt.last_state.edges()),
+        "last_energy": opt.last_energy,
+        "rng_state": opt.rng.getstate(),
+        "trace": opt.trace,
+        "memo_stats": opt.memo_stats,
+    }
+
+
+def _zobrist_table(nodes, seed: int) -> dict:
+    """symmetric random 64-bit key per node pair; an edge set hashes to the XOR of its keys"""
+
+    rng = random.Random(seed)
+    nodes = list(nodes)
+    table = {node: {} for node in nodes}
+    for i, u in enumerate(nodes):
+        for v in nodes[i + 1:]:
+            table[u][v] = table[v][u] = rng.getrandbits(64)
+    return table
+
+
+def _to_graph(nodes: list, edges: list) -> nx.Graph:
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+    return graph
@@ -0,0 +1,231 @@
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pathlib import Path
+
+from cache import CSV_COLUMNS
+from graph6 import HEADER, iter_graph6_chunks
+
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[1] / "data" / "parquet"
+
+SCHEMA = pa.schema([
+    ("graph6", pa.binary()),
+    ("num_edges", pa.int32()),
+    ("gpn", pa.int64()),
+    ("graph_class", pa.string()),
+    ("num_nodes", pa.int16()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("graph_class", pa.string()), ("num_nodes", pa.int16())]),
+    flavor="hive"
+)
+
+ROW_GROUP_SIZE = 64 * 1024
+
+
+class ResultStore:
+    """typed gpn results as Parquet partitioned by graph class and `num_nodes`
+
+    rows are written sorted by descending gpn, so the per-row-group min/max
+    statistics are tight and extremal queries read only a few row groups
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_ROOT):
+        self.root = Path(root)
+
+    def __repr__(self) -> str:
+        return f"ResultStore(root={str(self.root)!r})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def dataset(self) -> ds.Dataset:
+        if not self.root.exists():
+            raise FileNotFoundError(f"no results stored under {self.root}")
+        return ds.dataset(self.root, schema=SCHEMA, format="parquet", partitioning=PARTITIONING)
+
+    def write(
+        self,
+        graph6: list[str | bytes],
+        gpn: list[int] | np.ndarray,
+        graph_class: str,
+    ) -> int:
+        """append results of one graph class; node and edge counts are decoded from graph6"""
+
+        encodings = [_strip(encoding) for encoding in graph6]
+        if len(encodings) != len(gpn):
+            raise ValueError("graph6 and gpn must have the same length")
+        if not encodings:
+            return 0
+
+        num_nodes = np.empty(len(encodings), dtype=np.int16)
+        num_edges = np.empty(len(encodings), dtype=np.int32)
+        for chunk in iter_graph6_chunks(encodings, chunk_size=len(encodings)):
+            num_nodes[chunk.indices] = chunk.num_nodes
+            num_edges[chunk.indices] = chunk.num_edges
+
+        table = pa.table({
+            "graph6": pa.array(encodings, type=pa.binary()),
+            "num_edges": num_edges,
+            "gpn": pa.array(np.asarray(gpn, dtype=np.int64)),
+            "graph_class": pa.array([graph_class] * len(encodings), type=pa.string()),
+            "num_nodes": num_nodes,
+        }, schema=SCHEMA)
+        table = table.sort_by([("num_nodes", "ascending"), ("gpn", "descending")])
+
+        ds.write_dataset(
+            table,
+            self.root,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            min_rows_per_group=min(ROW_GROUP_SIZE, len(table)),
+            max_rows_per_group=ROW_GROUP_SIZE,
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        )
+
+        return len(table)
+
+    def import_csv(
+        self,
+        path: str | Path,
+        graph_class: str | None = None,
+        chunk_size: int = 1_000_000
+    ) -> int:
+        """stream one of the csv result tables (plain or zipped) into the store
+
+        the class comes from a `type` column when there is one, otherwise from
+        `graph_class` (e.g. "bipartite" for bp_graph_data_n12.csv)
+        """
+
+        header = pd.read_csv(path, nrows=0).columns
+        columns = next((pair for pair in CSV_COLUMNS if set(pair) <= set(header)), None)
+        if columns is None:
+            raise ValueError(f"{path} has no graph6/gpn columns")
+        if "type" not in header and graph_class is None:
+            raise ValueError(f"{path} has no `type` column; pass graph_class")
+
+        encoding_column, value_column = columns
+        usecols = [encoding_column, value_column] + (["type"] if "type" in header else [])
+
+        written = 0
+        for frame in pd.read_csv(path, usecols=usecols, chunksize=chunk_size, dtype={encoding_column: str}):
+            frame = frame.dropna()
+            classes = frame["type"] if "type" in frame else pd.Series(graph_class, index=frame.index)
+            for name, group in frame.groupby(classes, sort=False):
+                written += self.write(group[encoding_column].tolist(), group[value_column].to_numpy(), name)
+
+        return written
+
+    def argmax(self, graph_class: str | None = None, num_nodes: int | None = None) -> pd.DataFrame:
+        """every graph attaining the maximum gpn, per number of nodes"""
+
+        return self._extremal(graph_class, num_nodes, largest=True)
+
+    def argmin(self, graph_class: str | None = None, num_nodes: int | None = None) -> pd.DataFrame:
+        """every graph attaining the minimum gpn, per number of nodes"""
+
+        return self._extremal(graph_class, num_nodes, largest=False)
+
+    def top_k(
+        self,
+        k: int,
+        graph_class: str | None = None,
+        num_nodes: int | None = None,
+        largest: bool = True
+    ) -> pd.DataFrame:
+        """k graphs with the largest (or smallest) gpn, per number of nodes"""
+
+        bounds = self._gpn_bounds(graph_class, num_nodes)
+        frames = []
+        for n, row_groups in sorted(bounds.items()):
+            # a value threshold that k rows are guaranteed to pass lets pushdown skip row groups
+            ranked = sorted(row_groups, key=lambda b: b[1] if largest else -b[0], reverse=True)
+            covered, threshold = 0, None
+            for low, high, count in ranked:
+                covered += count
+                # groups from separate writes overlap, so the bound is over every covered group
+                if largest:
+                    threshold = low if threshold is None else min(threshold, low)
+                else:
+                    threshold = high if threshold is None else max(threshold, high)
+                if covered >= k:
+                    break
+            bound = pc.field("gpn") >= threshold if largest else pc.field("gpn") <= threshold
+
+            table = self.dataset().to_table(filter=self._filter(graph_class, n) & bound)
+            table = table.sort_by([("gpn", "descending" if largest else "ascending")]).slice(0, k)
+            frames.append(self._to_pandas(table))
+
+        return _concat(frames)
+
+    def histogram(self, graph_class: str | None = None, num_nodes: int | None = None) -> pd.DataFrame:
+        """number of graphs for every (num_nodes, num_edges, gpn) value"""
+
+        table = self.dataset().to_table(
+            columns=["num_nodes", "num_edges", "gpn"],
+            filter=self._filter(graph_class, num_nodes)
+        )
+        counts = table.group_by(["num_nodes", "num_edges", "gpn"]).aggregate([("gpn", "count")])
+        counts = counts.rename_columns(["num_nodes", "num_edges", "gpn", "count"])
+        return counts.sort_by([("num_nodes", "ascending"), ("num_edges", "ascending"), ("gpn", "ascending")]) \
+            .to_pandas()
+
+    def _extremal(self, graph_class, num_nodes, largest: bool) -> pd.DataFrame:
+        bounds = self._gpn_bounds(graph_class, num_nodes)
+        frames = []
+        for n, row_groups in sorted(bounds.items()):
+            # the extremum is read off row-group statistics; only matching groups are scanned
+            value = max(high for _, high, _ in row_groups) if largest else min(low for low, _, _ in row_groups)
+            table = self.dataset().to_table(filter=self._filter(graph_class, n) & (pc.field("gpn") == value))
+            frames.append(self._to_pandas(table))
+
+        return _concat(frames)
+
+    def _gpn_bounds(self, graph_class, num_nodes) -> dict[int, list[tuple[int, int, int]]]:
+        """(min, max, num_rows) of the gpn column for every row group, per number of nodes"""
+
+        bounds: dict[int, list[tuple[int, int, int]]] = {}
+        for fragment in self.dataset().get_fragments(filter=self._filter(graph_class, num_nodes)):
+            n = ds.get_partition_keys(fragment.partition_expression)["num_nodes"]
+            fragment.ensure_complete_metadata()
+            for row_group in fragment.row_groups:
+                stats = row_group.statistics.get("gpn")
+                if stats is None:
+                    # no statistics: fall back to a range that forces a scan
+                    stats = {"min": -(1 << 62), "max": 1 << 62}
+                bounds.setdefault(n, []).append((stats["min"], stats["max"], row_group.num_rows))
+        return bounds
+
+    @staticmethod
+    def _filter(graph_class: str | None, num_nodes: int | None) -> pc.Expression:
+        expression = pc.scalar(True)
+        if graph_class is not None:
+            expression = expression & (pc.field("graph_class") == graph_class)
+        if num_nodes is not None:
+            expression = expression & (pc.field("num_nodes") == num_nodes)
+        return expression
+
+    @staticmethod
+    def _to_pandas(table: pa.Table) -> pd.DataFrame:
+        frame = table.to_pandas()
+        frame["graph6"] = frame["graph6"].map(bytes.decode)
+        return frame[["graph6", "graph_class", "num_nodes", "num_edges", "gpn"]]
+
+
+def _strip(encoding: str | bytes) -> bytes:
+    encoding = encoding.encode() if isinstance(encoding, str) else encoding
+    encoding = encoding.strip()
+    return encoding[len(HEADER):] if encoding.startswith(HEADER) else encoding
+
+
+def _concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    if not frames:
+        return pd.DataFrame(columns=["graph6", "graph_class", "num_nodes", "num_edges", "gpn"])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,376 @@
+import os
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Iterator
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+
+import instrument
+from graph6 import iter_graph6_chunks
+from graph6_index import Graph6Index
+from generators import BACKENDS, iter_graph6, resolve_backend
+from utils import gpn_batch
+
+
+# geng options for every graph class studied in the project
+GENG_CLASS_ARGS = {
+    "connected": "-c",
+    "bipartite": "-b -c",
+    "cubic": "-d3 -D3 -c",
+    "triangle-free": "-t -c",
+}
+
+# output layouts of the existing result tables
+LAYOUTS = {
+    # gpn_class_data.csv / cubic_graphs_upto18.csv
+    "class": ("graph6_encoding", "type", "num_nodes", "num_edges", "gpn_num"),
+    # bp_graph_data_n11.csv / bp_graph_data_n12.csv
+    "id": ("id", "gpn_num"),
+    # all_graphs_edge_data.csv
+    "edge": ("num_nodes", "num_edges", "gpn_num"),
+}
+
+SPLITS = ("blocks", "resmod")
+
+
+class Sweep:
+    """exhaustive gpn sweep over one enumeration, split into resumable shards
+
+    the enumeration is either a geng call (`graph_class` + `num_nodes`) or an
+    existing graph6 file (`g6_path`); shards are split either into round-robin
+    blocks of `block_size` graphs (order-preserving, works for every source) or
+    with geng's native `res/mod` (merged order follows shards). geng sweeps
+    default to `res/mod`: with blocks every shard runs the whole enumeration
+    and keeps only 1/num_shards of it. file sweeps always use blocks, read
+    through the file's offset index.
+
+    each `.done` marker records the settings its shard was produced with; a
+    shard whose settings differ from this sweep's counts as pending and is redone
+    """
+
+    def __init__(
+        self,
+        out_dir: str | Path,
+        num_shards: int,
+        graph_class: str = "connected",
+        num_nodes: int | None = None,
+        g6_path: str | Path | None = None,
+        layout: str = "class",
+        split: str | None = None,
+        block_size: int = 4096,
+        count_trivial: bool = True,
+        backend: str = "auto"
+    ):
+        self.out_dir = Path(out_dir)
+        self.num_shards = num_shards
+        self.graph_class = graph_class
+        self.num_nodes = num_nodes
+        self.g6_path = Path(g6_path) if g6_path is not None else None
+        self.layout = layout
+        self.split = split if split is not None else ("blocks" if g6_path is not None else "resmod")
+        self.block_size = block_size
+        self.count_trivial = count_trivial
+        self.backend = backend
+
+        self._validate_args()
+
+    def __repr__(self) -> str:
+        source = f"g6_path={str(self.g6_path)!r}" if self.g6_path else \
+            f"graph_class={self.graph_class!r}, num_nodes={self.num_nodes}"
+        return f"Sweep({source}, num_shards={self.num_shards}, split={self.split!r})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def _validate_args(self) -> None:
+        if not isinstance(self.num_shards, int) or self.num_shards < 1:
+            raise ValueError("num_shards must be a positive integer")
+        if not isinstance(self.block_size, int) or self.block_size < 1:
+            raise ValueError("block_size must be a positive integer")
+        if self.layout not in LAYOUTS:
+            raise ValueError(f"layout must be one of {sorted(LAYOUTS)}")
+        if self.split not in SPLITS:
+            raise ValueError(f"split must be one of {SPLITS}")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}")
+        if self.g6_path is None:
+            if self.graph_class not in GENG_CLASS_ARGS:
+                raise ValueError(f"graph_class must be one of {sorted(GENG_CLASS_ARGS)}")
+            if not isinstance(self.num_nodes, int) or self.num_nodes < 1:
+                raise ValueError("num_nodes must be a positive integer for geng sweeps")
+        elif self.split == "resmod":
+            raise ValueError("res/mod splitting is only available for geng sweeps")
+
+    @property
+    def name(self) -> str:
+        if self.g6_path is not None:
+            return self.g6_path.stem
+        return f"{self.graph_class}_n{self.num_nodes}"
+
+    def shard_path(self, shard: int) -> Path:
+        return self.out_dir / f"{self.name}.shard-{shard:05d}-of-{self.num_shards:05d}.csv"
+
+    def marker_path(self, shard: int) -> Path:
+        return self.shard_path(shard).with_suffix(".done")
+
+    @property
+    def settings(self) -> dict:
+        """everything that shapes the rows of a shard, as recorded in its marker"""
+
+        settings = {
+            "num_shards": self.num_shards,
+            "split": self.split,
+            "block_size": self.block_size,
+            "layout": self.layout,
+            "count_trivial": self.count_trivial,
+        }
+        if self.g6_path is not None:
+            stat = self.g6_path.stat()
+            settings.update(g6_size=stat.st_size, g6_mtime=stat.st_mtime)
+        else:
+            settings.update(graph_class=self.graph_class, num_nodes=self.num_nodes, backend=resolve_backend(self.backend))
+        return settings
+
+    def is_done(self, shard: int) -> bool:
+        return self._recorded_settings(shard) == self.settings
+
+    def _recorded_settings(self, shard: int) -> dict | None:
+        marker = self.marker_path(shard)
+        if not marker.exists():
+            return None
+        try:
+            return json.loads(marker.read_text()).get("settings", {})
+        except (ValueError, AttributeError):
+            # markers that predate the settings record
+            return {}
+
+    @property
+    def pending_shards(self) -> list[int]:
+        return [shard for shard in range(self.num_shards) if not self.is_done(shard)]
+
+    def run(self, processes: int | None = None) -> list[int]:
+        """run every unfinished shard on a process pool; returns the shards that were run"""
+
+        pending = self.pending_shards
+        if self.g6_path is not None and pending:
+            # build the offset index once here rather than in every worker
+            Graph6Index.load(self.g6_path).close()
+
+        if processes == 1 or len(pending) <= 1:
+            for shard in pending:
+                self.run_shard(shard)
+            return pending
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            # list() re-raises the first shard failure; finished shards stay done
+            list(pool.map(_run_shard, [self] * len(pending), pending))
+
+        return pending
+
+    def run_shard(self, shard: int) -> int:
+        """score one shard and mark it complete; returns the number of rows written"""
+
+        if not 0 <= shard < self.num_shards:
+            raise ValueError(f"shard must be between 0 and {self.num_shards - 1}")
+        recorded = self._recorded_settings(shard)
+        if recorded == self.settings:
+            return -1
+        if recorded is not None:
+            logging.warning(f"shard {shard} of {self.name} was written with other settings; redoing it")
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        path = self.shard_path(shard)
+        partial = path.with_suffix(".part")
+
+        num_rows = 0
+        start = time.perf_counter()
+        timers_before = instrument.snapshot()["timers"] if instrument.enabled else {}
+        with open(partial, "w", encoding="utf-8") as f:
+            blocks = self._iter_shard_blocks(shard)
+            while True:
+                with instrument.timer("sweep.generate"):
+                    lines = next(blocks, None)
+                if lines is None:
+                    break
+                with instrument.timer("sweep.score"):
+                    rows = self._score(lines)
+                with instrument.timer("sweep.write"):
+                    f.writelines(rows)
+                num_rows += len(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # the marker is written last, so a crash at any point leaves the shard pending
+        os.replace(partial, path)
+        self.marker_path(shard).write_text(json.dumps({"rows": num_rows, "settings": self.settings}) + "\n")
+
+        if instrument.enabled:
+            instrument.event(
+                "shard", sweep=self.name, shard=shard, rows=num_rows, seconds=time.perf_counter() - start,
+                stages=_stage_seconds(timers_before, instrument.snapshot()["timers"])
+            )
+
+        return num_rows
+
+    def merge(self, output_path: str | Path, header: bool = True) -> int:
+        """merge completed shards into one table with the same rows as a sequential sweep"""
+
+        return merge([self], output_path, header)
+
+    def _iter_source(self, shard: int) -> Iterator[bytes]:
+        args = GENG_CLASS_ARGS[self.graph_class]
+        if self.split == "resmod":
+            args = f"{args} {shard}/{self.num_shards}"
+        for graph6 in iter_graph6(self.num_nodes, args, self.backend):
+            yield graph6.encode()
+
+    def _iter_shard_blocks(self, shard: int) -> Iterator[list[bytes]]:
+        """blocks of graph6 lines that belong to `shard`"""
+
+        # the offset index lets a file shard read its own blocks and skip the rest
+        if self.g6_path is not None:
+            index = Graph6Index.load(self.g6_path)
+            step = self.num_shards * self.block_size
+            for start in range(shard * self.block_size, len(index), step):
+                yield index.lines(start, start + self.block_size)
+            index.close()
+            return
+
+        lines = (line.strip() for line in self._iter_source(shard))
+        blocks = _chunked((line for line in lines if line), self.block_size)
+
+        # res/mod shards already hold only their own graphs
+        if self.split == "resmod":
+            yield from blocks
+            return
+
+        for block_index, block in enumerate(blocks):
+            if block_index % self.num_shards == shard:
+                yield block
+
+    def _score(self, lines: list[bytes]) -> list[str]:
+        encodings = [line.decode() for line in lines]
+        rows = [None] * len(lines)
+
+        for chunk in iter_graph6_chunks(lines, chunk_size=len(lines)):
+            values = gpn_batch(chunk.bitsets, count_trivial=self.count_trivial)
+            for position, num_edges, value in zip(chunk.indices, chunk.num_edges, values):
+                rows[position] = self._format_row(encodings[position], chunk.num_nodes, num_edges, value)
+
+        return rows
+
+    def _format_row(self, encoding: str, num_nodes: int, num_edges: int, value: int) -> str:
+        if self.layout == "class":
+            return f"{encoding},{self.graph_class},{num_nodes},{num_edges},{value}\n"
+        if self.layout == "id":
+            return f"{encoding},{value}\n"
+        return f"{num_nodes},{num_edges},{value}\n"
+
+
+def _stage_seconds(before: dict, after: dict) -> dict[str, float]:
+    return {
+        name: timer["seconds"] - before.get(name, {"seconds": 0.0})["seconds"]
+        for name, timer in after.items()
+        if name.startswith(("sweep.", "gpn_batch"))
+    }
+
+
+def _run_shard(sweep: Sweep, shard: int) -> int:
+    return sweep.run_shard(shard)
+
+
+def _chunked(items: Iterator[bytes], size: int) -> Iterator[list[bytes]]:
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def merge(sweeps: list[Sweep], output_path: str | Path, header: bool = True) -> int:
+    """concatenate the shards of several sweeps (in the given order) into one csv"""
+
+    for sweep in sweeps:
+        if sweep.pending_shards:
+            raise RuntimeError(f"{sweep} has unfinished shards {sweep.pending_shards}")
+    layouts = {sweep.layout for sweep in sweeps}
+    if len(layouts) > 1:
+        raise ValueError("all merged sweeps must share the same layout")
+
+    num_rows = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        if header and sweeps:
+            out.write(",".join(LAYOUTS[sweeps[0].layout]) + "\n")
+        for sweep in sweeps:
+            for row in _iter_merged_rows(sweep):
+                out.write(row)
+                num_rows += 1
+
+    return num_rows
+
+
+def _iter_merged_rows(sweep: Sweep) -> Iterator[str]:
+    files = [open(sweep.shard_path(shard), encoding="utf-8") for shard in range(sweep.num_shards)]
+    try:
+        if sweep.split == "resmod":
+            for f in files:
+                yield from f
+            return
+
+        # undo the round-robin block assignment; only the very last block can be short
+        block_index = 0
+        while True:
+            f = files[block_index % sweep.num_shards]
+            taken = 0
+            for row in f:
+                yield row
+                taken += 1
+                if taken == sweep.block_size:
+                    break
+            if taken < sweep.block_size:
+                return
+            block_index += 1
+    finally:
+        for f in files:
+            f.close()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="sharded, resumable gpn sweep")
+    parser.add_argument("out_dir")
+    parser.add_argument("--num-shards", type=int, required=True)
+    parser.add_argument("--shard", type=int, action="append", help="run only these shards (e.g. on another machine)")
+    parser.add_argument("--graph-class", default="connected", choices=sorted(GENG_CLASS_ARGS))
+    parser.add_argument("--num-nodes", type=int)
+    parser.add_argument("--g6-path")
+    parser.add_argument("--layout", default="class", choices=sorted(LAYOUTS))
+    parser.add_argument("--split", choices=SPLITS, help="default: resmod for geng sweeps, blocks for files")
+    parser.add_argument("--block-size", type=int, default=4096)
+    parser.add_argument("--backend", default="auto", choices=BACKENDS, help="graph generator for geng sweeps")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--merge", help="write the merged table here once all shards are done")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    sweep = Sweep(
+        args.out_dir,
+        args.num_shards,
+        graph_class=args.graph_class,
+        num_nodes=args.num_nodes,
+        g6_path=args.g6_path,
+        layout=args.layout,
+        split=args.split,
+        block_size=args.block_size,
+        backend=args.backend,
+    )
+
+    if args.shard:
+        for shard in args.shard:
+            sweep.run_shard(shard)
+    else:
+        sweep.run(args.processes)
+
+    if args.merge:
+        sweep.merge(args.merge)
@@ -1,6 +1,14 @@
+import math
+import time
+import random
+import numpy as np
 import networkx as nx
+from typing import NamedTuple
+from statistics import NormalDist
 from collections import deque
 
+import instrument
+
 
 def gpn(
     G: nx.Graph,
@@ -8,34 +16,384 @@ def gpn(
     ) -> int:
     """total number of shortest paths between all unordered pairs of nodes on a graph"""
     
+    if instrument.enabled:
+        start = time.perf_counter()
+
     gpn = G.number_of_nodes() if count_trivial else 0
     nodes = list(G.nodes())
 
     # source to BFS
     for source_index, source_node in enumerate(nodes):
+        sigma = _bfs_sigma(G, source_node)
 
-        dist = {source_node: 0}
-        sigma = {source_node: 1} # number of shortest paths to each node
-        queue = deque([source_node]) # bfs init
+        # count number of shortest paht of source node
+        for target_node in nodes[source_index + 1:]:
+            gpn += sigma.get(target_node, 0)
 
-        # BFS traversal
-        while queue:
-            current_node = queue.popleft()
+    if instrument.enabled:
+        _record_gpn(G, time.perf_counter() - start)
 
-            for neighbor in G[current_node]:
-                
-                # if: no visit to neighbor
-                if neighbor not in dist:
-                    dist[neighbor] = dist[current_node] + 1
-                    sigma[neighbor] = sigma[current_node]
-                    queue.append(neighbor)
+    return gpn
 
-                # if: neighbor already discovered at shortest distance
-                elif dist[neighbor] == dist[current_node] + 1:
-                    sigma[neighbor] += sigma[current_node]
 
-        # count number of shortest paht of source node
-        for target_node in nodes[source_index + 1:]:
-            gpn += sigma.get(target_node, 0)
+def _record_gpn(G: nx.Graph, seconds: float) -> None:
+    """relaxation counts of one `gpn` call, derived from the component sizes
+
+    every source pops each node of its component once and scans each of its
+    edges from both ends, so the counts need no bookkeeping inside the BFS
+    """
+
+    vertices, edges = 0, 0
+    for component in nx.connected_components(G):
+        size = len(component)
+        vertices += size * size
+        edges += size * 2 * G.subgraph(component).number_of_edges()
+
+    instrument.add_time("gpn", seconds)
+    instrument.count("gpn.vertex_relaxations", vertices)
+    instrument.count("gpn.edge_relaxations", edges)
+
+
+ORBIT_MIN_NODES = 16
+
+
+def gpn_orbits(
+    G: nx.Graph,
+    count_trivial: bool = True,
+    orbits: list[list] | None = None
+    ) -> int:
+    """`gpn` with one BFS per automorphism orbit instead of one per node
+
+    the number of shortest paths leaving a source is the same for every node of
+    its orbit, so each orbit contributes |orbit| * (paths from one representative);
+    summing over ordered pairs counts every unordered pair twice. without
+    precomputed `orbits` the classes of `canonical.symmetry_classes` are used:
+    they may split an orbit but never join two. symmetric graphs gain several
+    times (about 4x on the 40-62 node vertex-transitive cubic fixtures, more on
+    K_{a,b} and long cycles and prisms), far from the |V|x of one pass per
+    orbit because the colouring and the automorphism search cost a few passes
+    of their own; graphs without symmetry pay that cost too, about 15-30% over
+    `gpn`. below `ORBIT_MIN_NODES` nodes even symmetric graphs save less than
+    that, so small graphs go straight to `gpn`
+    """
+
+    if orbits is None:
+        if G.number_of_nodes() < ORBIT_MIN_NODES:
+            return gpn(G, count_trivial)
+        from canonical import symmetry_classes
+        orbits = symmetry_classes(G)
+
+    ordered_total = 0
+    for orbit in orbits:
+        sigma = _bfs_sigma(G, orbit[0])
+        ordered_total += len(orbit) * (sum(sigma.values()) - 1)
+
+    trivial = G.number_of_nodes() if count_trivial else 0
+    return trivial + ordered_total // 2
+
+
+class GPNEstimate(NamedTuple):
+    """sampled gpn with a normal-approximation confidence interval"""
+
+    value: float
+    low: float
+    high: float
+    num_sources: int
+
+
+ESTIMATE_STRATEGIES = ("uniform", "degree", "adaptive")
+
+
+def gpn_estimate(
+    G: nx.Graph,
+    num_sources: int | None = None,
+    strategy: str = "uniform",
+    rel_error: float | None = None,
+    confidence: float = 0.95,
+    count_trivial: bool = True,
+    seed: int | random.Random | None = None,
+    num_strata: int = 4,
+    sources: list | None = None
+    ) -> GPNEstimate:
+    """unbiased estimate of `gpn` from BFS runs out of a sample of sources
+
+    gpn is half the sum over sources of the paths leaving each source, so the
+    sum is estimated from sources drawn without replacement:
+        "uniform"  -- one simple random sample
+        "degree"   -- strata of similar degree, sampled proportionally
+        "adaptive" -- degree strata, extra sources go where the observed
+                      spread is largest (Neyman allocation); only the rounds
+                      of `rel_error` reallocate, so it requires `rel_error`
+    with `rel_error`, sources are added in rounds until the interval half-width
+    is below `rel_error` * estimate (or every node has been used, which is exact).
+    every stratum needs two sources for its variance, so `num_sources` below two
+    per stratum is an error. `sources` fixes the sample instead, e.g. to compare
+    graphs on common sources
+    """
+
+    if strategy not in ESTIMATE_STRATEGIES:
+        raise ValueError(f"strategy must be one of {ESTIMATE_STRATEGIES}")
+    if strategy == "adaptive" and rel_error is None:
+        raise ValueError("strategy 'adaptive' requires rel_error; without it, it is the same as 'degree'")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+
+    nodes = list(G.nodes())
+    trivial = len(nodes) if count_trivial else 0
+    if not nodes:
+        return GPNEstimate(0.0, 0.0, 0.0, 0)
+
+    rng = seed if isinstance(seed, random.Random) else random.Random(seed)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    if sources is not None:
+        strata, queues = [nodes], [list(sources)]
+    else:
+        strata = [nodes] if strategy == "uniform" else _degree_strata(G, nodes, num_strata)
+        queues = [rng.sample(stratum, len(stratum)) for stratum in strata]
+        minimum = sum(min(len(stratum), 2) for stratum in strata)
+        if num_sources is not None and num_sources < minimum:
+            raise ValueError(f"num_sources must be at least {minimum} (two per stratum) for this graph")
+    samples = [[] for _ in strata]
+
+    def draw(stratum: int, count: int) -> None:
+        for source in queues[stratum][len(samples[stratum]):len(samples[stratum]) + count]:
+            samples[stratum].append(sum(_bfs_sigma(G, source).values()) - 1)
+
+    budget = len(queues[0]) if sources is not None else (num_sources or min(len(nodes), 32))
+    for stratum, count in enumerate(_allocate(strata, samples, budget, proportional=True)):
+        draw(stratum, count)
+
+    while True:
+        total, variance = _stratified_total(strata, samples)
+        half_width = z * math.sqrt(variance)
+        drawn = sum(map(len, samples))
+        exhausted = all(len(sample) == len(queue) for sample, queue in zip(samples, queues))
+        if rel_error is None or exhausted or half_width <= rel_error * total:
+            break
+        allocation = _allocate(strata, samples, max(len(strata), drawn // 2), proportional=strategy != "adaptive")
+        for stratum, count in enumerate(allocation):
+            draw(stratum, count)
+
+    # every unordered pair is reached from both of its ends
+    return GPNEstimate(
+        trivial + total / 2,
+        trivial + (total - half_width) / 2,
+        trivial + (total + half_width) / 2,
+        drawn
+    )
+
+
+def _degree_strata(G: nx.Graph, nodes: list, num_strata: int) -> list[list]:
+    """nodes split into at most `num_strata` groups of consecutive degrees and similar size"""
+
+    ordered = sorted(nodes, key=G.degree)
+    target = len(ordered) / num_strata
+    strata = [[ordered[0]]]
+    for previous, node in zip(ordered, ordered[1:]):
+        # one degree never spans two strata
+        if len(strata[-1]) >= target and G.degree(node) != G.degree(previous) and len(strata) < num_strata:
+            strata.append([])
+        strata[-1].append(node)
+    return strata
+
+
+def _allocate(strata: list[list], samples: list[list], budget: int, proportional: bool) -> list[int]:
+    """how many more sources each stratum gets out of `budget`
+
+    every stratum is topped up to two samples first (for its variance), the rest
+    follows stratum size or, for Neyman allocation, size times observed spread
+    """
+
+    room = [len(stratum) - len(sample) for stratum, sample in zip(strata, samples)]
+    counts = [min(max(2 - len(sample), 0), r) for sample, r in zip(samples, room)]
+    budget -= sum(counts)
+
+    weights = []
+    for stratum, sample, r, c in zip(strata, samples, room, counts):
+        if r - c <= 0:
+            weights.append(0.0)
+        elif proportional or len(sample) < 2:
+            weights.append(float(len(stratum)))
+        else:
+            weights.append(len(stratum) * (_sample_variance(sample) ** 0.5 or 1.0))
+
+    while budget > 0 and any(weights):
+        weight_total = sum(weights)
+        shares = [math.floor(budget * w / weight_total) for w in weights]
+        if not any(shares):
+            shares[weights.index(max(weights))] = 1
+        for i, share in enumerate(shares):
+            share = min(share, room[i] - counts[i], budget)
+            counts[i] += share
+            budget -= share
+            if counts[i] == room[i]:
+                weights[i] = 0.0
+
+    return counts
+
+
+def _stratified_total(strata: list[list], samples: list[list]) -> tuple[float, float]:
+    """estimated sum over all sources and its variance (with finite population correction)"""
+
+    total, variance = 0.0, 0.0
+    for stratum, sample in zip(strata, samples):
+        size, k = len(stratum), len(sample)
+        if k == 0:
+            continue
+        total += size * sum(sample) / k
+        if 1 < k < size:
+            variance += size * size * (1 - k / size) * _sample_variance(sample) / k
+    return total, variance
+
+
+def _sample_variance(sample: list[int]) -> float:
+    mean = sum(sample) / len(sample)
+    return sum((x - mean) ** 2 for x in sample) / (len(sample) - 1)
+
+
+def _bfs_sigma(G: nx.Graph, source_node) -> dict:
+    """number of shortest paths from `source_node` to every node it reaches"""
+
+    dist = {source_node: 0}
+    sigma = {source_node: 1} # number of shortest paths to each node
+    queue = deque([source_node]) # bfs init
+
+    # BFS traversal
+    while queue:
+        current_node = queue.popleft()
+
+        for neighbor in G[current_node]:
+
+            # if: no visit to neighbor
+            if neighbor not in dist:
+                dist[neighbor] = dist[current_node] + 1
+                sigma[neighbor] = sigma[current_node]
+                queue.append(neighbor)
+
+            # if: neighbor already discovered at shortest distance
+            elif dist[neighbor] == dist[current_node] + 1:
+                sigma[neighbor] += sigma[current_node]
+
+    return sigma
+
+
+def to_adjacency_stack(graphs: list[nx.Graph]) -> np.ndarray:
+    """stack same-order graphs into a (num_graphs, n, n) uint8 adjacency array"""
+
+    graphs = list(graphs)
+    if not graphs:
+        return np.zeros((0, 0, 0), dtype=np.uint8)
+
+    n = graphs[0].number_of_nodes()
+    stack = np.zeros((len(graphs), n, n), dtype=np.uint8)
+
+    for index, graph in enumerate(graphs):
+        if graph.number_of_nodes() != n:
+            raise ValueError("all graphs in a batch must have the same number of nodes")
+        # relabel to positions so arbitrary node labels are supported
+        position = {node: i for i, node in enumerate(graph.nodes())}
+        for u, v in graph.edges():
+            stack[index, position[u], position[v]] = 1
+            stack[index, position[v], position[u]] = 1
+
+    return stack
+
+
+def unpack_bitsets(bitsets: np.ndarray, num_nodes: int) -> np.ndarray:
+    """expand (num_graphs, n) bitset rows (bit j of row i <=> edge ij) into a dense uint8 stack"""
+
+    bitsets = np.asarray(bitsets, dtype=np.uint64)
+    if bitsets.ndim != 2 or bitsets.shape[1] != num_nodes:
+        raise ValueError("bitsets must have shape (num_graphs, num_nodes)")
+    if num_nodes > 64:
+        raise ValueError("bitset rows support at most 64 nodes")
+
+    shifts = np.arange(num_nodes, dtype=np.uint64)
+    return ((bitsets[:, :, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+def biadjacency_bitsets(biadjacency: np.ndarray) -> np.ndarray:
+    """(num_graphs, rows + cols) bitset rows of bipartite graphs given as a 0/1 (num_graphs, rows, cols) stack
+
+    row i becomes node i and column j node rows + j
+    """
+
+    biadjacency = np.asarray(biadjacency, dtype=np.uint64)
+    if biadjacency.ndim != 3:
+        raise ValueError("biadjacency must have shape (num_graphs, rows, cols)")
+    num_graphs, rows, cols = biadjacency.shape
+    if rows + cols > 64:
+        raise ValueError("bitset rows support at most 64 nodes")
+
+    row_weights = np.left_shift(np.uint64(1), np.arange(rows, dtype=np.uint64))
+    col_weights = np.left_shift(np.uint64(1), np.arange(rows, rows + cols, dtype=np.uint64))
+
+    bitsets = np.empty((num_graphs, rows + cols), dtype=np.uint64)
+    bitsets[:, :rows] = (biadjacency * col_weights).sum(axis=2, dtype=np.uint64)
+    bitsets[:, rows:] = (biadjacency * row_weights[:, None]).sum(axis=1, dtype=np.uint64)
+    return bitsets
+
+
+def gpn_batch(
+    adjacency_stack: np.ndarray,
+    count_trivial: bool = True,
+    batch_size: int = 4096
+    ) -> np.ndarray:
+    """gpn of many same-order graphs at once; returns an int64 array matching `gpn` per graph
+
+    `adjacency_stack` is either a dense (num_graphs, n, n) 0/1 array or a
+    (num_graphs, n) array of uint64 bitset rows (n <= 64)
+    """
+
+    stack = np.asarray(adjacency_stack)
+    if stack.ndim == 2:
+        stack = unpack_bitsets(stack, stack.shape[1])
+    if stack.ndim != 3 or stack.shape[1] != stack.shape[2]:
+        raise ValueError("adjacency_stack must have shape (num_graphs, n, n) or (num_graphs, n)")
+
+    num_graphs, n = stack.shape[0], stack.shape[1]
+    result = np.empty(num_graphs, dtype=np.int64)
+
+    with instrument.timer("gpn_batch"):
+        for start in range(0, num_graphs, batch_size):
+            chunk = stack[start:start + batch_size]
+            result[start:start + len(chunk)] = _gpn_layers(chunk)
+    if instrument.enabled:
+        instrument.count("gpn_batch.graphs", num_graphs)
+
+    if count_trivial:
+        result += n
+
+    return result
+
+
+def _gpn_layers(adjacency: np.ndarray) -> np.ndarray:
+    """layer-by-layer path counting from every source of every graph in the chunk"""
+
+    num_graphs, n = adjacency.shape[0], adjacency.shape[1]
+    if n == 0 or num_graphs == 0:
+        return np.zeros(num_graphs, dtype=np.int64)
+
+    # float64 matmul goes through BLAS and is exact while counts stay below 2**53,
+    # which holds for every graph with n <= 64 (counts are bounded by ~3**(n/3))
+    adjacency = (adjacency != 0).astype(np.float64)
+
+    # frontier[b, s, t] = number of shortest s-t paths for t in the current BFS layer of s
+    frontier = np.broadcast_to(np.eye(n), (num_graphs, n, n)).copy()
+    visited = frontier.astype(bool)
+    total = np.zeros(num_graphs, dtype=np.float64)
+
+    while True:
+        frontier = np.matmul(frontier, adjacency)
+        frontier[visited] = 0.0
+
+        reached = frontier > 0
+        if not reached.any():
+            break
+
+        visited |= reached
+        total += frontier.sum(axis=(1, 2))
 
-    return gpn
\ No newline at end of file
+    # sigma(s, t) == sigma(t, s), so ordered pairs count every unordered pair twice
+    return (total // 2).astype(np.int64)
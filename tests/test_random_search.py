@@ -0,0 +1,25 @@
+import numpy as np
+
+from canonical import CanonicalSearch
+from objects import RandomBalancedBipartiteGraph
+from random_search import random_search
+from utils import biadjacency_bitsets, gpn_batch
+
+
+def test_random_search_matches_brute_force_dedup():
+    num_nodes, num_samples, top_k, seed = 8, 4000, 10, 1
+    result = random_search(num_nodes, num_samples, top_k=top_k, batch_size=1024, seed=seed)
+
+    # the same samples, drawn batch by batch as random_search does, deduplicated by canonical form
+    rng = np.random.default_rng(seed)
+    best = {}
+    for start in range(0, num_samples, 1024):
+        probabilities = rng.uniform(0.3, 0.9, size=1024)
+        bitsets = biadjacency_bitsets(RandomBalancedBipartiteGraph.sample_biadjacency(num_nodes, probabilities, 1024, rng))
+        for rows, value in zip(bitsets, gpn_batch(bitsets)):
+            best[CanonicalSearch.from_bitsets([int(row) for row in rows]).graph6()] = int(value)
+    expected = sorted(best.values(), reverse=True)[:top_k]
+
+    assert [value for value, _ in result] == expected
+    assert len({encoding for _, encoding in result}) == top_k
+    assert all(best[encoding] == value for value, encoding in result)
@@ -0,0 +1,19 @@
+import networkx as nx
+
+from store import ResultStore
+
+
+def _encodings(count: int) -> list[bytes]:
+    # distinct 5-node graphs, so every row lands in the num_nodes=5 partition
+    graphs = [nx.path_graph(5), nx.cycle_graph(5), nx.star_graph(4), nx.complete_graph(5), nx.wheel_graph(5)]
+    return [nx.to_graph6_bytes(graphs[i % len(graphs)], header=False).strip() for i in range(count)]
+
+
+def test_top_k_overlapping_row_groups(tmp_path):
+    store = ResultStore(tmp_path)
+    # two writes give two row groups whose gpn ranges overlap
+    store.write(_encodings(4), [33, 21, 21, 20], "test")
+    store.write(_encodings(2), [32, 31], "test")
+
+    assert store.top_k(5)["gpn"].tolist() == [33, 32, 31, 21, 21]
+    assert store.top_k(5, largest=False)["gpn"].tolist() == [20, 21, 21, 31, 32]